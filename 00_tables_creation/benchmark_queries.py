@@ -0,0 +1,90 @@
+"""
+Time the joins and group-bys the agents usually generate, before and after indexes.sql.
+
+    uv run generate_data.py --sales 1000000
+    uv run benchmark_queries.py --db ../data_synthetic.db
+
+The indexes of the database are dropped first, the queries are timed, indexes.sql is
+applied and the queries are timed again. The database is left with the indexes.
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+QUERIES = {
+    "sales by category": """
+        SELECT items_info.category, SUM(sell_info.value) AS total
+        FROM sell_info JOIN items_info ON sell_info.item_id = items_info.item_id
+        GROUP BY items_info.category
+    """,
+    "sales by gender": """
+        SELECT user_info.gender, SUM(sell_info.value) AS total
+        FROM sell_info JOIN user_info ON sell_info.user_id = user_info.user_id
+        GROUP BY user_info.gender
+    """,
+    "top 10 items": """
+        SELECT items_info.item_name, SUM(sell_info.value) AS total
+        FROM sell_info JOIN items_info ON sell_info.item_id = items_info.item_id
+        GROUP BY items_info.item_name ORDER BY total DESC LIMIT 10
+    """,
+    "sales of one user": "SELECT * FROM sell_info WHERE sell_info.user_id = 42",
+    "sales of one item": "SELECT COUNT(*), SUM(sell_info.value) FROM sell_info WHERE sell_info.item_id = 7",
+    "one week by item": """
+        SELECT sell_info.item_id, SUM(sell_info.value) AS total
+        FROM sell_info WHERE sell_info.date BETWEEN 100 AND 106
+        GROUP BY sell_info.item_id
+    """,
+    "age of buyers by category": """
+        SELECT items_info.category, AVG(user_info.age) AS age
+        FROM sell_info
+        JOIN items_info ON sell_info.item_id = items_info.item_id
+        JOIN user_info ON sell_info.user_id = user_info.user_id
+        WHERE sell_info.date BETWEEN 1 AND 30
+        GROUP BY items_info.category
+    """,
+}
+
+
+def time_query(conn: sqlite3.Connection, sql_query: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql_query).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def drop_indexes(conn: sqlite3.Connection):
+    names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")]
+    for name in names:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+    conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(SCRIPT_DIR, "..", "data_synthetic.db"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    rows = conn.execute("SELECT COUNT(*) FROM sell_info").fetchone()[0]
+
+    drop_indexes(conn)
+    before = {name: time_query(conn, sql_query, args.repeat) for name, sql_query in QUERIES.items()}
+
+    start = time.perf_counter()
+    with open(os.path.join(SCRIPT_DIR, "indexes.sql")) as file:
+        conn.executescript(file.read())
+    indexing_seconds = time.perf_counter() - start
+    after = {name: time_query(conn, sql_query, args.repeat) for name, sql_query in QUERIES.items()}
+    conn.close()
+
+    print(f"{rows} sell_info rows, indexes.sql took {indexing_seconds:.1f}s, best of {args.repeat}")
+    print(f"{'query':<28}{'no indexes ms':>15}{'indexes ms':>12}{'speedup':>9}")
+    for name in QUERIES:
+        print(f"{name:<28}{before[name]:>15.1f}{after[name]:>12.1f}{before[name] / after[name]:>8.1f}x")
@@ -0,0 +1,135 @@
+"""
+Fill the schema of init_db.sql with synthetic data, to see how the agents behave at scale.
+
+Examples:
+    uv run generate_data.py --sales 1000000
+    uv run generate_data.py --db ../data_10m.db --users 1000000 --items 50000 --sales 10000000
+
+Distributions:
+    - users: age roughly normal around 38 (16 to 90), gender 50/50
+    - items: categories with uneven sizes
+    - sales: a few users and items concentrate most of the sales (Zipf-like),
+      dates are days over a year with more sales on weekends, values log-normal
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import Callable
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CATEGORIES = ["toys", "food", "books", "electronics", "clothes", "home", "sports", "beauty"]
+CATEGORY_WEIGHTS = [0.10, 0.30, 0.12, 0.08, 0.18, 0.10, 0.07, 0.05]
+DAYS = 365
+CHUNK_SIZE = 200_000
+
+
+def create_tables(conn: sqlite3.Connection):
+    """Run only the CREATE TABLE statements of init_db.sql, so the schema is always the same"""
+    with open(os.path.join(SCRIPT_DIR, "init_db.sql")) as file:
+        statements = file.read().split(";")
+    for statement in statements:
+        if statement.strip().upper().startswith("CREATE TABLE"):
+            conn.execute(statement.strip().replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+
+def zipf_sampler(rng: np.random.Generator, n_ids: int, exponent: float = 1.1) -> Callable[[int], np.ndarray]:
+    """
+    Draws ids from 1 to n_ids where a few ids are much more frequent, shuffled so popularity
+    is not sorted by id. The popular ids are chosen once, every chunk drawn from the same
+    sampler has the same hot users and items.
+    """
+    cumulative = np.cumsum(1.0 / np.arange(1, n_ids + 1) ** exponent)
+    cumulative /= cumulative[-1]
+    popularity = rng.permutation(n_ids) + 1
+
+    def sample(size: int) -> np.ndarray:
+        ranks = np.searchsorted(cumulative, rng.random(size), side="right")
+        return popularity[np.minimum(ranks, n_ids - 1)]
+
+    return sample
+
+
+def insert_users(conn: sqlite3.Connection, rng: np.random.Generator, users: int):
+    for start in range(0, users, CHUNK_SIZE):
+        ids = np.arange(start + 1, min(start + CHUNK_SIZE, users) + 1)
+        ages = np.clip(rng.normal(38, 14, len(ids)), 16, 90).astype(int)
+        genders = rng.choice(["M", "F"], len(ids))
+        conn.executemany(
+            "INSERT INTO user_info (user_id, age, gender, name, lastname) VALUES (?, ?, ?, ?, ?)",
+            (
+                (int(user_id), int(age), str(gender), f"person-{user_id}-name", f"person-{user_id}-lastname")
+                for user_id, age, gender in zip(ids, ages, genders)
+            ),
+        )
+
+
+def insert_items(conn: sqlite3.Connection, rng: np.random.Generator, items: int):
+    categories = rng.choice(CATEGORIES, items, p=CATEGORY_WEIGHTS)
+    conn.executemany(
+        "INSERT INTO items_info (item_id, item_name, category) VALUES (?, ?, ?)",
+        ((item_id, f"item{item_id}", str(category)) for item_id, category in enumerate(categories, start=1)),
+    )
+
+
+def insert_sales(conn: sqlite3.Connection, rng: np.random.Generator, sales: int, users: int, items: int):
+    day_weights = np.array([1.4 if day % 7 in (5, 6) else 1.0 for day in range(DAYS)])
+    day_weights /= day_weights.sum()
+    user_sampler = zipf_sampler(rng, users, exponent=0.8)
+    item_sampler = zipf_sampler(rng, items)
+
+    for start in range(0, sales, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, sales - start)
+        user_ids = user_sampler(size)
+        item_ids = item_sampler(size)
+        dates = rng.choice(DAYS, size, p=day_weights) + 1
+        values = np.maximum(1, rng.lognormal(3, 1, size)).astype(int)
+        conn.executemany(
+            "INSERT INTO sell_info (user_id, item_id, date, value) VALUES (?, ?, ?, ?)",
+            zip(user_ids.tolist(), item_ids.tolist(), dates.tolist(), values.tolist()),
+        )
+        print(f"\r  sell_info: {start + size}/{sales}", end="", flush=True)
+    print()
+
+
+def generate(db_path: str, users: int, items: int, sales: int, seed: int, with_indexes: bool):
+    if os.path.exists(db_path):
+        raise SystemExit(f"{db_path} already exists, remove it or choose another --db")
+
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db_path)
+    # Bulk load: no journal nor fsync, the file is thrown away if this fails anyway
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    start = time.perf_counter()
+    create_tables(conn)
+    insert_users(conn, rng, users)
+    insert_items(conn, rng, items)
+    insert_sales(conn, rng, sales, users, items)
+    conn.commit()
+    print(f"Inserted {users} users, {items} items and {sales} sales in {time.perf_counter() - start:.1f}s")
+
+    if with_indexes:
+        start = time.perf_counter()
+        with open(os.path.join(SCRIPT_DIR, "indexes.sql")) as file:
+            conn.executescript(file.read())
+        print(f"Created indexes in {time.perf_counter() - start:.1f}s")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(SCRIPT_DIR, "..", "data_synthetic.db"))
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-indexes", action="store_true", help="do not run indexes.sql after loading")
+    args = parser.parse_args()
+
+    generate(args.db, args.users, args.items, args.sales, args.seed, not args.no_indexes)
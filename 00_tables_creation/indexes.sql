@@ -0,0 +1,10 @@
+-- Join keys of the small tables
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_info_user_id ON user_info (user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_info_item_id ON items_info (item_id);
+-- The sell_info indexes include value (and the join keys, for date) so group-bys never go back to the table,
+-- with only (user_id) / (item_id) SQLite joins through random table lookups, slower than no index at all
+CREATE INDEX IF NOT EXISTS idx_sell_info_user_id ON sell_info (user_id, value);
+CREATE INDEX IF NOT EXISTS idx_sell_info_item_id ON sell_info (item_id, value);
+CREATE INDEX IF NOT EXISTS idx_sell_info_date ON sell_info (date, item_id, user_id, value);
+-- Statistics for the query planner (and the row estimates of get_database_schema)
+ANALYZE;
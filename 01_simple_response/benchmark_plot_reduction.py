@@ -0,0 +1,76 @@
+"""
+Render time of big query results with the reduction stage of plot_reduction.py.
+
+For 1k, 100k and 1M rows it renders a categorical x-axis (top-N + "other"), a numeric
+date x-axis (LTTB) and a non-numeric result (table preview). Drawing every row, as it
+was done before, is only measured for 1k rows, bigger inputs take minutes.
+"uv run benchmark_plot_reduction.py"
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from chart_renderer import draw_dataframe, figure_to_png
+from plot_reduction import reduce_for_plot
+
+SIZES = [1_000, 100_000, 1_000_000]
+UNREDUCED_MAX_ROWS = 1_000
+
+
+def make_frames(rows: int) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    return {
+        "categorical": pd.DataFrame({
+            "item_name": [f"item{i}" for i in rng.integers(0, max(rows // 10, 1), rows)],
+            "total": rng.integers(1, 100, rows),
+        }),
+        "date": pd.DataFrame({
+            "date": np.arange(rows),
+            "value": np.cumsum(rng.normal(size=rows)),
+        }),
+        "table": pd.DataFrame({
+            "name": [f"person-{i}-name" for i in range(rows)],
+            "lastname": [f"person-{i}-lastname" for i in range(rows)],
+        }),
+    }
+
+
+def draw_unreduced(df: pd.DataFrame) -> bytes:
+    fig = Figure()
+    ax = fig.add_subplot()
+    if pd.api.types.is_numeric_dtype(df.dtypes.iloc[1]):
+        ax.bar(df.iloc[:, 0].astype(str), df.iloc[:, 1])
+    else:
+        ax.text(0.1, 0.5, df.to_string(), fontfamily="monospace", fontsize=8)
+        ax.axis("off")
+    fig.tight_layout()
+    return figure_to_png(fig, dpi=100, bbox_inches="tight")
+
+
+def timed_ms(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return 1000 * (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    # Drawing every row does not fit the figure, which is the point of the comparison
+    warnings.filterwarnings("ignore", message="Tight layout not applied")
+
+    print(f"{'rows':>10}  {'input':<12}{'reduce ms':>12}{'render ms':>12}{'points':>8}{'unreduced ms':>15}")
+    for rows in SIZES:
+        for name, df in make_frames(rows).items():
+            if name == "table":
+                reduce_ms, points = 0.0, "-"
+            else:
+                start = time.perf_counter()
+                _, reduced = reduce_for_plot(df)
+                reduce_ms = 1000 * (time.perf_counter() - start)
+                points = str(len(reduced))
+
+            render_ms = timed_ms(draw_dataframe, df)
+            unreduced = f"{timed_ms(draw_unreduced, df):.0f}" if rows <= UNREDUCED_MAX_ROWS else "skipped"
+            print(f"{rows:>10}  {name:<12}{reduce_ms:>12.1f}{render_ms:>12.1f}{points:>8}{unreduced:>15}")
@@ -0,0 +1,107 @@
+"""
+Concurrent execute_sql_query latency: open/close per query vs SQLiteReadPool.
+
+Builds a temporary copy of the sales schema with synthetic rows and runs the same
+queries from several threads, like concurrent Gradio requests do.
+"uv run benchmark_sqlite_pool.py"
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from sqlite_pool import SQLiteReadPool
+
+SELL_ROWS = 200_000
+THREADS = 8
+
+# Dashboard style lookups, where opening the connection is most of the cost
+LOOKUP_QUERIES = [
+    "SELECT * FROM user_info WHERE user_id = 42",
+    "SELECT item_name, category FROM items_info WHERE item_id = 7",
+    "SELECT category, COUNT(*) AS items FROM items_info GROUP BY category",
+    "SELECT gender, AVG(age) AS age FROM user_info GROUP BY gender",
+]
+
+# Full scans of sell_info, where the warm page cache and mmap of the pooled connections help
+ANALYTICS_QUERIES = [
+    "SELECT items_info.category, SUM(sell_info.value) AS total FROM sell_info JOIN items_info ON sell_info.item_id = items_info.item_id GROUP BY items_info.category",
+    "SELECT item_id, COUNT(*) AS sales FROM sell_info WHERE date BETWEEN 100 AND 200 GROUP BY item_id",
+]
+
+def create_database(db_path: str):
+    init_sql = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "00_tables_creation", "init_db.sql")
+    conn = sqlite3.connect(db_path)
+    with open(init_sql) as file:
+        conn.executescript(file.read())
+
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO user_info VALUES (?, ?, ?, ?, ?)",
+        [(i, rng.randint(10, 80), rng.choice("MF"), f"name-{i}", f"lastname-{i}") for i in range(4, 10_000)],
+    )
+    conn.executemany(
+        "INSERT INTO items_info VALUES (?, ?, ?)",
+        [(i, f"item{i}", rng.choice(["toys", "food", "books", "tools"])) for i in range(4, 1_000)],
+    )
+    conn.executemany(
+        "INSERT INTO sell_info VALUES (?, ?, ?, ?)",
+        [(rng.randint(1, 9_999), rng.randint(1, 999), rng.randint(1, 365), rng.randint(1, 100)) for _ in range(SELL_ROWS)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def open_per_query(db_path: str, sql_query: str):
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query(sql_query, conn)
+    conn.close()
+    return df
+
+
+def run(execute, queries: list[str], queries_per_thread: int) -> tuple[float, float]:
+    latencies = []
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in range(queries_per_thread):
+            start = time.perf_counter()
+            execute(rng.choice(queries))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(worker, range(THREADS)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return len(latencies) / elapsed, 1000 * latencies[int(0.95 * len(latencies))]
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "data.db")
+        create_database(db_path)
+
+        pool = SQLiteReadPool(db_path, max_connections=THREADS)
+
+        def pooled(sql_query: str):
+            with pool.connection() as conn:
+                return pd.read_sql_query(sql_query, conn)
+
+        print(f"{THREADS} threads, {SELL_ROWS} sell_info rows")
+        print(f"{'queries':<12}{'mode':<16}{'queries/s':>12}{'p95 ms':>10}")
+        for name, queries, queries_per_thread in [
+            ("lookup", LOOKUP_QUERIES, 500),
+            ("analytics", ANALYTICS_QUERIES, 10),
+        ]:
+            baseline = run(lambda sql_query: open_per_query(db_path, sql_query), queries, queries_per_thread)
+            pooled_result = run(pooled, queries, queries_per_thread)
+            print(f"{name:<12}{'open per query':<16}{baseline[0]:>12.1f}{baseline[1]:>10.2f}")
+            print(f"{name:<12}{'pooled':<16}{pooled_result[0]:>12.1f}{pooled_result[1]:>10.2f}")
+
+        pool.close()
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from plot_reduction import reduce_for_plot, table_preview
+
+
+def dataframe_hash(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame: columns, dtypes, index and values"""
+    digest = hashlib.sha256()
+    digest.update(repr((list(df.columns), [str(dtype) for dtype in df.dtypes])).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts...)
+        digest.update(df.to_csv().encode())
+    return digest.hexdigest()
+
+
+def figure_to_png(fig: Figure, **savefig_kwargs) -> bytes:
+    FigureCanvasAgg(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", **savefig_kwargs)
+    return buf.getvalue()
+
+
+def draw_dataframe(df: pd.DataFrame, plot_type: str = "bar") -> bytes:
+    # Every render gets its own Figure, nothing goes through pyplot's global state
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    if df.empty:
+        ax.text(0.5, 0.5, "No data found", ha="center", va="center")
+        ax.set_title("No Results")
+    elif plot_type == "bar" and len(df.columns) >= 2 and pd.api.types.is_numeric_dtype(df.dtypes.iloc[1]):
+        # Big results are reduced first (top-N categories or downsampled series)
+        kind, data = reduce_for_plot(df)
+        x_values, y_values = data.iloc[:, 0], data.iloc[:, 1]
+        if kind == "bar":
+            ax.bar(x_values.astype(str), y_values, label=str(df.columns[1]))
+        else:
+            ax.plot(x_values, y_values, label=str(df.columns[1]))
+        ax.set_xlabel(str(df.columns[0]))
+        ax.legend()
+        reduced = f" ({len(data)} points from {len(df)} rows)" if len(data) != len(df) else ""
+        ax.set_title(f"Query Results{reduced}")
+        ax.tick_params(axis="x", labelrotation=45)
+    else:
+        ax.text(0.1, 0.5, table_preview(df), fontfamily="monospace", fontsize=8)
+        ax.set_title("Query Results (Table)")
+        ax.axis("off")
+
+    fig.tight_layout()
+    return figure_to_png(fig, dpi=100, bbox_inches="tight")
+
+
+def draw_message(text: str, title: str) -> bytes:
+    fig = Figure()
+    ax = fig.add_subplot()
+    ax.text(0.5, 0.5, text, ha="center", va="center")
+    ax.set_title(title)
+    return figure_to_png(fig)
+
+
+class ChartRenderer:
+    """
+    Renders charts to PNG in a small worker pool, with a cache keyed by the
+    DataFrame content hash and the plot type.
+
+    Concurrent requests for the same chart share a single render.
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 64):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart-renderer")
+        self._cache: OrderedDict[tuple[str, str], Future[bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, df: pd.DataFrame, plot_type: str = "bar") -> Future[bytes]:
+        key = (dataframe_hash(df), plot_type)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return future
+
+            self.misses += 1
+            future = self._executor.submit(draw_dataframe, df, plot_type)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        future.add_done_callback(lambda done: self._forget_failed(key, done))
+        return future
+
+    def render(self, df: pd.DataFrame, plot_type: str = "bar") -> bytes:
+        return self.submit(df, plot_type).result()
+
+    async def render_async(self, df: pd.DataFrame, plot_type: str = "bar") -> bytes:
+        return await asyncio.wrap_future(self.submit(df, plot_type))
+
+    def render_message(self, text: str, title: str) -> bytes:
+        return self._executor.submit(draw_message, text, title).result()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+    def _forget_failed(self, key: tuple[str, str], future: Future):
+        if future.exception() is not None:
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
@@ -1,7 +1,5 @@
 import gradio as gr
-import matplotlib.pyplot as plt
 import pandas as pd
-import sqlite3
 import io
 import os
 from PIL import Image
@@ -9,116 +7,100 @@ from langchain_community.llms import OpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 import logging
+from translation_cache import TranslationCache
+from schema_cache import get_schema_cache
+from sqlite_pool import get_pool
+from result_cache import get_result_cache
+from chart_renderer import ChartRenderer
+from query_guard import query_guard
 
 logging.basicConfig(level=logging.INFO)
 
 logging.info("Starting setup")
 
-def setup_llm():
-    llm = OpenAI(temperature=0)
-    
-    prompt_template = """
+PROMPT_TEMPLATE = """
     Given the following user question about data, convert it to a valid SQL query.
     If you do joins, always explicite the table names before the column
 
     Database schemas
-    - Table: user_info
-    - schema columns: user_id INTEGER , age INTEGER, gender TEXT, name TEXT, lastname TEXT
-
-    - Table: sell_info
-    - schema columns: user_id INTEGER , item_id INTEGER , date INTEGER, value INTEGER
-
-    - Table: items_info
-    - schema columns: item_id INTEGER , item_name TEXT, category TEXT
-
+{schema}
     User question: {question}
     
     SQL Query (return only the SQL, no explanation):
     """
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), "data.db")
+
+# Repeated questions are answered from here instead of calling the LLM again
+translation_cache = TranslationCache(os.path.join(os.path.dirname(SCRIPT_DIR), "translation_cache.db"))
+
+chart_renderer = ChartRenderer()
+
+def setup_llm():
+    llm = OpenAI(temperature=0)
     
-    prompt = PromptTemplate(template=prompt_template, input_variables=["question"])
+    prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["question", "schema"])
     return LLMChain(llm=llm, prompt=prompt)
 
-def execute_sql_query(sql_query, db_path=None):
+def translate_to_sql(question, schema):
+    llm_chain = setup_llm()
+    return llm_chain.run(question=question, schema=schema).strip()
+
+def run_sql_query(sql_query, db_path):
+    # Read-only connections shared by every request, see sqlite_pool.py
+    with get_pool(db_path).connection() as conn:
+        # Cross joins are rejected before running and slow queries stopped, see query_guard.py
+        query_guard.check_plan(conn, sql_query, db_path)
+        with query_guard.budget(conn):
+            return pd.read_sql_query(sql_query, conn)
+
+def execute_sql_query(sql_query, db_path=DB_PATH):
     try:
-        if db_path is None:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(script_dir)
-            db_path = os.path.join(parent_dir, "data.db")
-        conn = sqlite3.connect(db_path)
-        df = pd.read_sql_query(sql_query, conn)
+        # Identical queries are served from memory until the database changes
+        result_cache = get_result_cache(db_path)
+        df = result_cache.get_or_execute(sql_query, lambda query: run_sql_query(query, db_path))
         logging.info(f"SQL Query executed successfully: {df}")
-        conn.close()
+        logging.info(f"Result cache: {result_cache.stats()}")
         return df, None
     except Exception as e:
         logging.error(f"Error executing SQL Query: {e}")
         return None, str(e)
 
+def png_to_image(png):
+    return gr.Image(Image.open(io.BytesIO(png)))
+
 def create_visualization(df, query_type, plot_type = "bar"):
-    if plot_type == "bar":
-            
-        plt.close()
-
-        if (len(df) == 1):
-            return df.to_string()
-
-        if df.empty:
-            plt.text(0.5, 0.5, 'No data found', ha='center', va='center')
-            plt.title("No Results")
-        else:
-            if len(df.columns) >= 2 and df.dtypes.iloc[1] in ['int64', 'float64']:
-                df.plot(x=df.columns[0], y=df.columns[1], kind='bar')
-                plt.title("Query Results")
-                plt.xticks(rotation=45)
-            else:
-                plt.text(0.1, 0.5, df.to_string(), fontfamily='monospace', fontsize=8)
-                plt.title("Query Results (Table)")
-                plt.axis('off')
-        
-        plt.tight_layout()
-        fig = plt.gcf()
-        
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        
-        pil_img = Image.open(buf)
-    return gr.Image(pil_img)
+    if (len(df) == 1):
+        return df.to_string()
+
+    # Rendered in the chart_renderer worker pool, on its own Figure
+    png = chart_renderer.render(df, plot_type)
+    logging.info(f"Chart renderer: {chart_renderer.stats()}")
+    return png_to_image(png)
 
 def chat_with_plot(message, history):
     try:
-        llm_chain = setup_llm()
-        
-        sql_query = llm_chain.run(question=message)
+        # Read from the database, only refreshed when its schema changes
+        schema_cache = get_schema_cache(DB_PATH)
+        schema = schema_cache.text()
+        fingerprint = schema_cache.fingerprint(PROMPT_TEMPLATE)
+        sql_query = translation_cache.get_or_translate(message, fingerprint, lambda question: translate_to_sql(question, schema))
         logging.info(f"Generated SQL Query: {sql_query}")
-        sql_query = sql_query.strip()
+        logging.info(f"Translation cache: {translation_cache.stats()}")
         
         df, error = execute_sql_query(sql_query)
         
         if error:
-            plt.close()
-            plt.text(0.5, 0.5, f'SQL Error: {error}', ha='center', va='center')
-            plt.title("Error")
-            fig = plt.gcf()
-            buf = io.BytesIO()
-            fig.savefig(buf, format='png')
-            buf.seek(0)
-            pil_img = Image.open(buf)
-            return gr.Image(pil_img)
+            # A bad translation is not served again from the cache
+            translation_cache.discard(sql_query)
+            return png_to_image(chart_renderer.render_message(f'SQL Error: {error}', "Error"))
         
         result_img = create_visualization(df, message)
         return [result_img,f"Query: \n {sql_query}"]
         
     except Exception as e:
-        plt.close()
-        plt.text(0.5, 0.5, f'Error: {str(e)}', ha='center', va='center')
-        plt.title("Error")
-        fig = plt.gcf()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        pil_img = Image.open(buf)
-        return gr.Image(pil_img)
+        return png_to_image(chart_renderer.render_message(f'Error: {str(e)}', "Error"))
 
 demo = gr.ChatInterface(fn=chat_with_plot)
 demo.launch()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# Limits of what is worth drawing, bigger inputs are reduced before plotting
+MAX_CATEGORIES = 20
+MAX_POINTS = 500
+MAX_TABLE_ROWS = 20
+MAX_TABLE_CHARS = 3000
+
+
+def is_continuous(series: pd.Series) -> bool:
+    """Numeric or date x-axes can be downsampled, anything else is treated as categories"""
+    if pd.api.types.is_bool_dtype(series):
+        return False
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+
+
+def top_n_with_other(df: pd.DataFrame, n: int = MAX_CATEGORIES) -> pd.DataFrame:
+    """Sum y by category, keep the n biggest ones and add the rest up in an "other" bar"""
+    x, y = df.columns[0], df.columns[1]
+    totals = df.groupby(x, sort=False, dropna=False)[y].sum().sort_values(ascending=False)
+    if len(totals) > n:
+        other = pd.Series([totals.iloc[n:].sum()], index=["other"])
+        totals = pd.concat([totals.iloc[:n], other])
+    return pd.DataFrame({x: totals.index.astype(str), y: totals.to_numpy()})
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling, returns the indices of the points to keep.
+
+    x must be sorted. The first and last points are always kept, from every bucket in
+    between it keeps the point that forms the largest triangle with the previously kept
+    point and the average of the next bucket, which preserves peaks and the overall shape.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+def reduce_for_plot(df: pd.DataFrame, max_categories: int = MAX_CATEGORIES, max_points: int = MAX_POINTS) -> tuple[str, pd.DataFrame]:
+    """
+    Reduce the first two columns (x, y) of a query result to something worth plotting.
+
+    Returns the kind of plot ("bar" or "line") and the reduced DataFrame. Small inputs with
+    unique x values are returned as they are. Only dates, and numbers with more than
+    max_points distinct values, become a line: a few hundred numeric x values are most
+    likely ids or codes, they are drawn as categories.
+    """
+    x, y = df.columns[0], df.columns[1]
+    data = df[[x, y]].dropna(subset=[y])
+    if len(data) <= max_categories and data[x].is_unique:
+        return "bar", data
+
+    is_date = pd.api.types.is_datetime64_any_dtype(data[x])
+    if not is_continuous(data[x]) or (not is_date and data[x].nunique() <= max_points):
+        return "bar", top_n_with_other(data, max_categories)
+
+    # One point per x value, LTTB expects a function of x
+    data = data.dropna(subset=[x]).groupby(x, sort=True, as_index=False)[y].sum()
+    x_values = data[x].to_numpy()
+    if is_date:
+        x_values = x_values.astype("datetime64[ns]").astype(np.int64)
+    indices = lttb(x_values.astype(float), data[y].to_numpy(dtype=float), max_points)
+    return "line", data.iloc[indices]
+
+
+def table_preview(df: pd.DataFrame, max_rows: int = MAX_TABLE_ROWS, max_chars: int = MAX_TABLE_CHARS) -> str:
+    """First rows of the result as text, instead of converting the whole DataFrame to a string"""
+    text = df.head(max_rows).to_string(max_colwidth=40)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    if len(df) > max_rows:
+        text += f"\n... {len(df) - max_rows} more rows"
+    return text
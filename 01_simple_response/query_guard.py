@@ -0,0 +1,210 @@
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from schema_cache import get_schema_cache
+
+_QUOTED = re.compile(r"""'(?:[^']|'')*'""")
+# Table (optionally quoted) after FROM / JOIN / a comma, followed by an optional alias
+_TABLE_REFERENCE = re.compile(r'(?:\bFROM|\bJOIN|,)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+_NOT_ALIASES = {
+    "ON", "USING", "WHERE", "GROUP", "ORDER", "LIMIT", "HAVING", "JOIN", "INNER", "LEFT", "RIGHT",
+    "FULL", "CROSS", "NATURAL", "OUTER", "UNION", "EXCEPT", "INTERSECT", "WINDOW", "AS",
+}
+# "SCAN t", "SCAN TABLE t" (older SQLite), "SCAN t USING COVERING INDEX i"... and skip-scans,
+# which read the whole index as well
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_SKIP_SCAN = re.compile(r"^SEARCH (?:TABLE )?(\w+) .*\bANY\(")
+
+
+class QueryGuardError(Exception):
+    """
+    A query that was not run, or was stopped, by the guard.
+
+    to_dict() is what the agent gets back: it says what went wrong and how to
+    rewrite the query, instead of an opaque SQLite error or a hanging tool call.
+    """
+
+    error_type = "query_guard"
+
+    def __init__(self, message: str, hint: str, **details: Any):
+        super().__init__(message)
+        self.hint = hint
+        self.details = details
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"error": self.args[0], "error_type": self.error_type, **self.details, "hint": self.hint}
+
+    def __str__(self) -> str:
+        return f"{self.args[0]}. {self.hint}"
+
+
+class QueryRejected(QueryGuardError):
+    error_type = "query_rejected"
+
+
+class QueryBudgetExceeded(QueryGuardError):
+    error_type = "query_budget_exceeded"
+
+
+def table_aliases(sql_query: str, tables: set[str]) -> dict[str, str]:
+    """Map every name a table can appear with in the query plan (its name and aliases) to the table"""
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(_QUOTED.sub("''", sql_query)):
+        if table not in tables:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in _NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def nested_scan_rows(plan: list[tuple], row_estimate: Callable[[str], int | None]) -> tuple[int, list[str]]:
+    """
+    Largest number of rows visited by nested full scans in an EXPLAIN QUERY PLAN.
+
+    Loops of the same select are listed in nesting order under the same parent, so full
+    scans one after the other multiply. A correlated subquery runs once per row of the
+    loops before it. Returns the row product and the scanned tables of the worst nest.
+    """
+    children: dict[int, list[tuple[int, str]]] = {}
+    for node_id, parent, _, detail in plan:
+        children.setdefault(parent, []).append((node_id, detail))
+
+    def walk(parent: int, outer_rows: int, outer_tables: list[str]) -> tuple[int, list[str]]:
+        rows, tables = outer_rows, outer_tables
+        worst = (rows, tables)
+        for node_id, detail in children.get(parent, []):
+            match = _FULL_SCAN.match(detail) or _SKIP_SCAN.match(detail)
+            if match:
+                estimate = row_estimate(match.group(1))
+                if estimate is not None:
+                    rows, tables = rows * max(estimate, 1), tables + [match.group(1)]
+                    worst = max(worst, (rows, tables))
+            elif detail.startswith("CORRELATED"):
+                worst = max(worst, walk(node_id, rows, tables))
+            else:
+                # Materialized views, CTEs and plain subqueries run once
+                worst = max(worst, walk(node_id, 1, []))
+        return worst
+
+    return walk(0, 1, [])
+
+
+class QueryGuard:
+    """
+    Protects the server from the SQL the LLM writes.
+
+    Before running, check_plan() asks EXPLAIN QUERY PLAN (which does not execute the query)
+    for nested full scans, the shape of a join without a usable join condition, and rejects
+    them when the row estimates of the tables multiply above max_cross_join_rows.
+
+    While running, budget() stops the query after max_seconds or max_vm_steps SQLite
+    virtual machine instructions. The progress handler is called every check_every
+    instructions; a timer calling interrupt() covers the long single steps (big sorts)
+    between two progress handler calls. The timer is joined before budget() returns, so no
+    interrupt() reaches the connection once it is handed back.
+    """
+
+    def __init__(
+        self,
+        max_cross_join_rows: int = 10_000_000,
+        max_seconds: float = 10.0,
+        max_vm_steps: int = 500_000_000,
+        check_every: int = 10_000,
+    ):
+        self.max_cross_join_rows = max_cross_join_rows
+        self.max_seconds = max_seconds
+        self.max_vm_steps = max_vm_steps
+        self.check_every = check_every
+
+    def check_plan(self, conn: sqlite3.Connection, sql_query: str, db_path: str):
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
+        schema = get_schema_cache(db_path).get()
+        aliases = table_aliases(sql_query, set(schema))
+
+        def row_estimate(name: str) -> int | None:
+            table = aliases.get(name, name if name in schema else None)
+            return schema[table].get("row_estimate") if table else None
+
+        rows, scanned = nested_scan_rows(plan, row_estimate)
+        if len(scanned) >= 2 and rows > self.max_cross_join_rows:
+            tables = [aliases.get(name, name) for name in scanned]
+            raise QueryRejected(
+                f"Query rejected: full scans of {' x '.join(tables)} would combine about {rows} rows",
+                "Join the tables on their key columns (for example sell_info.user_id = user_info.user_id), "
+                "filter them with WHERE or aggregate before joining",
+                reason="cross_join",
+                tables=tables,
+                estimated_rows=rows,
+                max_rows=self.max_cross_join_rows,
+            )
+
+    @contextmanager
+    def budget(self, conn: sqlite3.Connection) -> Iterator[None]:
+        """Run the statements of the block on conn with the time and VM-step budget"""
+        start = time.monotonic()
+        deadline = start + self.max_seconds
+        state = {"steps": 0, "exceeded": None, "active": True, "interrupted": False}
+        lock = threading.Lock()
+
+        def progress() -> int:
+            state["steps"] += self.check_every
+            if state["steps"] > self.max_vm_steps:
+                state["exceeded"] = "vm_steps"
+            elif time.monotonic() > deadline:
+                state["exceeded"] = "time"
+            # Non-zero aborts the running statement
+            return 1 if state["exceeded"] else 0
+
+        def on_timeout():
+            with lock:
+                if state["active"]:
+                    state["exceeded"] = state["exceeded"] or "time"
+                    state["interrupted"] = True
+                    conn.interrupt()
+
+        timer = threading.Timer(self.max_seconds, on_timeout)
+        timer.daemon = True
+        conn.set_progress_handler(progress, self.check_every)
+        timer.start()
+        try:
+            try:
+                yield
+            finally:
+                # No interrupt() may reach the connection once the block is over, the next
+                # query of the pooled connection would be the one stopped. join() waits for
+                # an on_timeout() that is already running.
+                with lock:
+                    state["active"] = False
+                timer.cancel()
+                timer.join()
+                conn.set_progress_handler(None, 0)
+        except Exception as e:
+            # sqlite3 raises OperationalError("interrupted"), pandas wraps it in its DatabaseError
+            if state["exceeded"] is None:
+                raise
+            raise self._exceeded(state, start) from e
+        if state["interrupted"]:
+            # The interrupt came after the last statement of the block returned. It is still
+            # pending on the statements left open on conn (a paged cursor) and would stop
+            # their next step, so they must be dropped as well
+            raise self._exceeded(state, start)
+
+    def _exceeded(self, state: dict[str, Any], start: float) -> QueryBudgetExceeded:
+        return QueryBudgetExceeded(
+            f"Query stopped: it used more than {self.max_seconds:g}s or {self.max_vm_steps} SQLite steps",
+            "Make it cheaper: filter with WHERE, aggregate with GROUP BY, avoid joins without "
+            "a join condition, or add LIMIT",
+            reason=state["exceeded"],
+            elapsed_seconds=round(time.monotonic() - start, 3),
+            vm_steps=state["steps"],
+            max_seconds=self.max_seconds,
+            max_vm_steps=self.max_vm_steps,
+        )
+
+
+query_guard = QueryGuard()
@@ -0,0 +1,132 @@
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import pandas as pd
+
+# Literals, quoted identifiers and comments are kept as they are, only the whitespace
+# between them (the last group) is collapsed
+_TOKEN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]|--[^\n]*(?:\n|\Z)|/\*.*?(?:\*/|\Z)|(\s+)""",
+    re.DOTALL,
+)
+
+
+def canonicalize_sql(sql_query: str) -> str:
+    """
+    Collapse whitespace outside literals, quoted identifiers and comments, and drop the
+    trailing semicolon. Two queries only get the same key if SQLite reads them the same.
+    """
+    canonical = _TOKEN.sub(lambda match: " " if match.group(1) else match.group(0), sql_query.strip())
+    return canonical.strip().rstrip(";").strip()
+
+
+class QueryResultCache:
+    """
+    Cache of query results (DataFrames) keyed by canonicalized SQL, bounded by bytes.
+
+    The whole cache is dropped as soon as the database changes. Changes are detected with
+    PRAGMA data_version, which only makes sense on a single connection, so the cache
+    keeps its own connection open just to ask for it. The file mtime is checked as well,
+    in case the file is replaced instead of written through SQLite.
+    Cached DataFrames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = os.path.abspath(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.current_bytes = 0
+
+        self._entries: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._version: tuple | None = None
+        self._lock = threading.Lock()
+        self._version_conn = sqlite3.connect(
+            pathlib.Path(self.db_path).as_uri() + "?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def get_or_execute(self, sql_query: str, execute: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        df, version = self.lookup(sql_query)
+        if df is None:
+            df = execute(sql_query)
+            self.store(sql_query, df, version)
+        return df
+
+    def lookup(self, sql_query: str) -> tuple[pd.DataFrame | None, tuple | None]:
+        """Return the cached result (or None) and the database version to pass to store()"""
+        key = canonicalize_sql(sql_query)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, self._version
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += entry[1]
+            return entry[0], self._version
+
+    def store(self, sql_query: str, df: pd.DataFrame, version: tuple | None):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            # Only keep the result if the database did not change while it was running
+            if size <= self.max_bytes and version == self._version:
+                self._store(canonicalize_sql(sql_query), df, size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_cached": self.current_bytes,
+            "entries": len(self._entries),
+        }
+
+    def _store(self, key: str, df: pd.DataFrame, size: int):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+
+        self._entries[key] = (df, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def _check_version(self):
+        data_version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        stat = os.stat(self.db_path)
+        version = (data_version, stat.st_mtime_ns, stat.st_ino)
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+_caches: dict[str, QueryResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(db_path: str) -> QueryResultCache:
+    """Return the process-wide result cache of the database, creating it on first use"""
+    db_path = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = QueryResultCache(db_path)
+            _caches[db_path] = cache
+        return cache
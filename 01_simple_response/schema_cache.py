@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pathlib
+import sqlite3
+import threading
+from typing import Any
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def estimate_rows(conn: sqlite3.Connection, table: str, has_stat1: bool) -> int | None:
+    """Row count estimate that never scans the table: ANALYZE stats if present, else MAX(rowid)"""
+    if has_stat1:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if row is not None and row[0]:
+            return int(row[0].split()[0])
+    try:
+        return conn.execute(f"SELECT MAX(rowid) FROM {quote_identifier(table)}").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID tables
+        return None
+
+
+def read_schema(conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+    objects = conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    has_stat1 = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+
+    schema = {}
+    for object_type, name in objects:
+        columns = [
+            f"{column_name} {column_type}".strip() + (" PRIMARY KEY" if pk else "")
+            for _, column_name, column_type, _, _, pk in conn.execute(f"PRAGMA table_info({quote_identifier(name)})")
+        ]
+        if object_type == "view":
+            schema[name] = {"columns": columns, "view": True}
+            continue
+
+        indexes = []
+        for _, index_name, unique, *_ in conn.execute(f"PRAGMA index_list({quote_identifier(name)})"):
+            index_columns = [row[2] for row in conn.execute(f"PRAGMA index_info({quote_identifier(index_name)})")]
+            indexes.append({"name": index_name, "columns": index_columns, "unique": bool(unique)})
+
+        schema[name] = {
+            "columns": columns,
+            "indexes": indexes,
+            "row_estimate": estimate_rows(conn, name, has_stat1),
+        }
+    return schema
+
+
+def format_schema(schema: dict[str, dict[str, Any]]) -> str:
+    """Schema in the same format the prompt templates used to hard-code"""
+    lines = []
+    for name, info in schema.items():
+        if info.get("view"):
+            lines.append(f"    - View: {name}")
+        else:
+            lines.append(f"    - Table: {name} (~{info['row_estimate']} rows)")
+        lines.append(f"    - schema columns: {' , '.join(info['columns'])}")
+        for index in info.get("indexes", []):
+            lines.append(f"    - index: {index['name']} ({', '.join(index['columns'])})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class SchemaCache:
+    """
+    Schema read from sqlite_master and PRAGMA table_info/index_list, cached until
+    PRAGMA schema_version changes, so on the hot path it costs a single pragma.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        self._conn = sqlite3.connect(
+            pathlib.Path(self.db_path).as_uri() + "?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._schema: dict[str, dict[str, Any]] = {}
+        self._text = ""
+        self._fingerprint = ""
+
+    def get(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._schema
+
+    def text(self) -> str:
+        """Schema formatted to be added to a prompt"""
+        with self._lock:
+            self._refresh()
+            return self._text
+
+    def fingerprint(self, *extra: str) -> str:
+        """Hash of the CREATE statements, plus anything else that depends on them (e.g. a prompt)"""
+        with self._lock:
+            self._refresh()
+            fingerprint = self._fingerprint
+        if not extra:
+            return fingerprint
+        return hashlib.sha256("".join((fingerprint, *extra)).encode()).hexdigest()
+
+    def _refresh(self):
+        version = self._conn.execute("PRAGMA schema_version").fetchone()[0]
+        if version == self._version:
+            return
+
+        self._schema = read_schema(self._conn)
+        self._text = format_schema(self._schema)
+        digest = hashlib.sha256()
+        for row in self._conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name"):
+            digest.update(repr(row).encode())
+        self._fingerprint = digest.hexdigest()
+        self._version = version
+
+
+_caches: dict[str, SchemaCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_schema_cache(db_path: str) -> SchemaCache:
+    """Return the process-wide schema cache of the database, creating it on first use"""
+    db_path = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = SchemaCache(db_path)
+            _caches[db_path] = cache
+        return cache
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from plot_reduction import MAX_CATEGORIES, reduce_for_plot
+
+
+def test_integer_ids_are_drawn_as_categories():
+    df = pd.DataFrame({"customer_id": np.arange(1, 31), "total": np.arange(30, 0, -1)})
+
+    kind, data = reduce_for_plot(df)
+
+    assert kind == "bar"
+    assert len(data) == MAX_CATEGORIES + 1
+    assert list(data["customer_id"][:3]) == ["1", "2", "3"]
+    assert data["customer_id"].iloc[-1] == "other"
+    assert data["total"].sum() == df["total"].sum()
+
+
+def test_duplicate_dates_are_summed_before_downsampling():
+    dates = pd.date_range("2024-01-01", periods=1000, freq="D")
+    df = pd.DataFrame({"date": np.repeat(dates, 2), "sales": np.ones(2000)})
+
+    kind, data = reduce_for_plot(df)
+
+    assert kind == "line"
+    assert data["date"].is_unique and data["date"].is_monotonic_increasing
+    assert (data["sales"] == 2).all()
@@ -0,0 +1,127 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+def normalize_question(question: str) -> str:
+    """
+    Collapse whitespace and drop trailing punctuation so trivial variants share an entry.
+    The case is kept, "sales in 'Buenos Aires'" and "sales in 'buenos aires'" need different SQL.
+    """
+    question = re.sub(r"\s+", " ", question.strip())
+    return question.rstrip("?!.; ")
+
+
+class TranslationCache:
+    """
+    Natural language -> SQL cache keyed by (normalized question, schema fingerprint).
+
+    Recent entries are kept in an in-memory LRU, every entry is also stored in a local
+    SQLite file so the cache survives restarts. Entries of a previous schema are dropped
+    the first time a new schema fingerprint is seen. A translation whose SQL fails is
+    discarded, so it is not served again.
+    """
+
+    def __init__(self, path: str, maxsize: int = 256, ttl: float = 24 * 3600):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+        self._current_fingerprint: str | None = None
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                question TEXT,
+                schema_fingerprint TEXT,
+                sql_query TEXT,
+                created_at REAL,
+                PRIMARY KEY (question, schema_fingerprint)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, question: str, fingerprint: str) -> str | None:
+        key = (normalize_question(question), fingerprint)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+
+            entry = self._memory.get(key)
+            if entry is None:
+                entry = self._conn.execute(
+                    "SELECT sql_query, created_at FROM translations WHERE question = ? AND schema_fingerprint = ?",
+                    key,
+                ).fetchone()
+                if entry is not None:
+                    self._remember(key, entry)
+
+            if entry is None or time.time() - entry[1] > self.ttl:
+                self.misses += 1
+                return None
+
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question: str, fingerprint: str, sql_query: str):
+        key = (normalize_question(question), fingerprint)
+        entry = (sql_query, time.time())
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._remember(key, entry)
+            self._conn.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", (*key, *entry))
+            self._conn.commit()
+
+    def get_or_translate(self, question: str, fingerprint: str, translate: Callable[[str], str]) -> str:
+        sql_query = self.get(question, fingerprint)
+        if sql_query is None:
+            sql_query = translate(question)
+            self.put(question, fingerprint, sql_query)
+        return sql_query
+
+    def discard(self, sql_query: str) -> int:
+        """Forget every translation to sql_query, once running it failed. Returns how many were cached"""
+        sql_query = sql_query.strip()
+        with self._lock:
+            for key in [k for k, entry in self._memory.items() if entry[0].strip() == sql_query]:
+                del self._memory[key]
+            deleted = self._conn.execute(
+                "DELETE FROM translations WHERE trim(sql_query, ' \n\r\t') = ?", (sql_query,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries_in_memory": len(self._memory),
+        }
+
+    def _remember(self, key: tuple[str, str], entry: tuple[str, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint == self._current_fingerprint:
+            return
+
+        # The schema changed (or this is the first call), translations of other schemas are stale
+        self._current_fingerprint = fingerprint
+        for key in [k for k in self._memory if k[1] != fingerprint]:
+            del self._memory[key]
+        self._conn.execute("DELETE FROM translations WHERE schema_fingerprint != ?", (fingerprint,))
+        self._conn.commit()
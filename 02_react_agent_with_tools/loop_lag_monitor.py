@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]})
+
+
+class _NodeTracker(BaseCallbackHandler):
+    """Keeps the graph nodes and tools that are running, to blame them for a stall"""
+
+    # Called on the event loop thread, so the monitor can be started from here
+    run_inline = True
+
+    def __init__(self, monitor: "LoopLagMonitor"):
+        self.monitor = monitor
+
+    def on_chain_start(self, serialized: dict[str, Any] | None, inputs: Any, *, run_id: UUID, metadata: dict[str, Any] | None = None, **kwargs: Any):
+        name = kwargs.get("name")
+        if metadata and name and metadata.get("langgraph_node") == name:
+            self.monitor.enter(run_id, f"node:{name}")
+
+    def on_tool_start(self, serialized: dict[str, Any] | None, input_str: str, *, run_id: UUID, **kwargs: Any):
+        self.monitor.enter(run_id, f"tool:{kwargs.get('name') or (serialized or {}).get('name')}")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        self.monitor.exit(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self.monitor.exit(run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self.monitor.exit(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self.monitor.exit(run_id)
+
+
+class LoopLagMonitor:
+    """
+    Opt-in detector of blocking calls on the event loop.
+
+    A heartbeat task sleeps interval seconds in a loop and measures how late it wakes up,
+    that is the event-loop lag every other coroutine suffered too. A watchdog thread
+    samples the stack of the loop thread while the heartbeat is late, so each stall over
+    threshold is reported with the code that was blocking and the graph nodes and tools
+    running at the time (tracked through LangChain callbacks, see instrument()).
+
+    Reports go to the log and, with report_path, one JSON object per line to that file.
+    Enabled with LOOP_LAG_MONITOR=1, see from_env().
+    """
+
+    def __init__(self, enabled: bool = True, threshold: float = 0.1, interval: float = 0.01, report_path: str | None = None):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.interval = interval
+        self.report_path = report_path
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=100)
+
+        self._running: dict[UUID, str] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat_at = time.monotonic()
+        self._sample: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+        self._watchdog: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls) -> "LoopLagMonitor":
+        return cls(
+            enabled=os.environ.get("LOOP_LAG_MONITOR", "") not in ("", "0", "false"),
+            threshold=float(os.environ.get("LOOP_LAG_THRESHOLD_MS", "100")) / 1000,
+            report_path=os.environ.get("LOOP_LAG_REPORT") or None,
+        )
+
+    def instrument(self, graph):
+        """The graph with the callbacks that track its running nodes and tools, the same graph if disabled"""
+        if not self.enabled:
+            return graph
+        return graph.with_config(callbacks=[_NodeTracker(self)])
+
+    @asynccontextmanager
+    async def lifespan(self, _server: Any):
+        """FastMCP lifespan, for MCP servers where there is no graph to instrument"""
+        self.start()
+        yield None
+
+    def start(self):
+        """Start watching the running event loop, it does nothing if disabled or already watching it"""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is loop:
+                return
+            self._loop = loop
+            self._loop_thread_id = threading.get_ident()
+            self._heartbeat_at = time.monotonic()
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+                self._watchdog.start()
+        loop.create_task(self._heartbeat())
+        logging.info(f"Loop lag monitor: reporting stalls over {1000 * self.threshold:.0f} ms")
+
+    def enter(self, run_id: UUID, label: str):
+        try:
+            self.start()
+        except RuntimeError:
+            # Sync graphs and nodes running in a worker thread, there is no loop here
+            pass
+        with self._lock:
+            self._running[run_id] = label
+
+    def exit(self, run_id: UUID):
+        with self._lock:
+            self._running.pop(run_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        stalls = list(self.stalls)
+        by_location: dict[str, int] = {}
+        for stall in stalls:
+            by_location[stall["location"]] = by_location.get(stall["location"], 0) + 1
+        return {
+            "stalls": len(stalls),
+            "max_lag_ms": max((stall["lag_ms"] for stall in stalls), default=0.0),
+            "by_location": by_location,
+        }
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while self._loop is loop:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                self._heartbeat_at = now
+                sample, self._sample = self._sample, None
+            lag = now - expected
+            if lag > self.threshold:
+                self._report(lag, sample)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                late = time.monotonic() - self._heartbeat_at > self.interval + self.threshold
+                if late and self._sample is None:
+                    # The loop thread is still inside the blocking call, its stack says which one
+                    self._sample = self._capture()
+
+    def _capture(self) -> dict[str, Any]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        own_frames = [entry for entry in stack if not entry.filename.startswith(_LIBRARY_PATHS)]
+        culprit = (own_frames or stack or [None])[-1]
+        return {
+            "running": sorted(set(self._running.values())),
+            "location": f"{os.path.basename(culprit.filename)}:{culprit.lineno} in {culprit.name}" if culprit else "unknown",
+            "stack": [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack[-20:]],
+        }
+
+    def _report(self, lag: float, sample: dict[str, Any] | None):
+        stall = {
+            "timestamp": time.time(),
+            "lag_ms": round(1000 * lag, 1),
+            **(sample or {"running": [], "location": "unknown (stall shorter than a watchdog tick)", "stack": []}),
+        }
+        self.stalls.append(stall)
+        logging.warning(f"Event loop blocked for {stall['lag_ms']} ms at {stall['location']}, running: {stall['running']}")
+        if self.report_path:
+            with open(self.report_path, "a") as file:
+                file.write(json.dumps(stall) + "\n")
+
+
+lag_monitor = LoopLagMonitor.from_env()
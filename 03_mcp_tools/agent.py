@@ -1,5 +1,7 @@
 from langgraph.prebuilt import create_react_agent
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from agent_events import AgentEventParser, Transcript
+from tool_memo import memoize_tools
 
 client = MultiServerMCPClient(
     {
@@ -13,7 +15,8 @@ client = MultiServerMCPClient(
 async def create_agent():
     agent = create_react_agent(
         "openai:gpt-4.1-nano",
-        tools = await client.get_tools(),
+        # The tools the server marks as pure are answered from a cache after the first call
+        tools = memoize_tools(await client.get_tools()),
     )
 
     return agent
@@ -21,24 +24,14 @@ async def create_agent():
 
 async def chat_async(message, history):
     #"Use the available tools to calculate 12 multiplied by 13"
-    response = ""
+    # Each chunk becomes typed events (tool calls, tool responses, content...), see agent_events.py
+    parser = AgentEventParser()
+    transcript = Transcript()
 
     agent = await create_agent()
     async for j in agent.astream(input = {"messages": [{"role": "user", "content": message}]}):
-        
-        if "agent" in j:
-            tool_calls = j["agent"]["messages"][0].tool_calls
-            if len(tool_calls):
-                response += f"Tool calls: {tool_calls}"
-                response += "\n \n"
+        if transcript.add(parser.parse(j)):
+            yield transcript.text
 
-            content = j["agent"]["messages"][0].content
-            if content:
-                response += f"Content: {content}"
-                response += "\n \n"
-
-        if "tools" in j:
-            response += f"Tool responses: {list(map(lambda row: {row.name: row.content}, j['tools']['messages']))}"
-            response += "\n \n"
-
-        yield response
\ No newline at end of file
+    if transcript.pending:
+        yield transcript.text
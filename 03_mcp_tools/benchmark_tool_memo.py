@@ -0,0 +1,77 @@
+"""
+Latency of repeated calls to the pure tools of tools_mcp.py, with and without the agent-side cache.
+
+The server is started on port 8000 and the calls go through one long-lived MCP session.
+CALLS calls to add and multiply are made with DISTINCT different argument pairs, as an
+agent that keeps asking the same operations over several turns. "server" is the plain
+MCP tool, one round trip per call (the server answers the repeats from its own cache);
+"memoized" is memoize_tools(), that only goes to the server for the first call of each pair.
+"uv run benchmark_tool_memo.py"
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from tool_memo import MemoCache, memoize_tools
+
+CALLS = 500
+DISTINCT = 20
+PORT = 8000
+
+
+async def wait_for_server(process: asyncio.subprocess.Process, timeout: float = 30.0):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.returncode is not None:
+            raise RuntimeError(f"tools_mcp.py exited with code {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", PORT)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise TimeoutError("tools_mcp.py did not start")
+
+
+async def measure(tools, name: str) -> list[float]:
+    by_name = {tool.name: tool for tool in tools}
+    latencies = []
+    for i in range(CALLS):
+        tool = by_name["add" if i % 2 else "multiply"]
+        start = time.perf_counter()
+        await tool.ainvoke({"a": i % DISTINCT, "b": 7})
+        latencies.append(time.perf_counter() - start)
+    print(f"{name:<10} p50 {1000 * statistics.median(latencies):6.2f} ms  "
+          f"p95 {1000 * statistics.quantiles(latencies, n=20)[-1]:6.2f} ms  total {sum(latencies):5.2f}s")
+    return latencies
+
+
+async def main():
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools_mcp.py"),
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        await wait_for_server(server)
+        client = MultiServerMCPClient({"calculus_server": {"url": f"http://127.0.0.1:{PORT}/mcp", "transport": "streamable_http"}})
+        async with client.session("calculus_server") as session:
+            tools = await load_mcp_tools(session)
+            print(f"{CALLS} calls, {DISTINCT} different argument pairs")
+            await measure(tools, "server")
+            cache = MemoCache()
+            await measure(memoize_tools(tools, cache=cache), "memoized")
+            for tool, stats in cache.stats().items():
+                print(f"  {tool:<9} hits {stats['hits']:>4}  misses {stats['misses']:>3}  hit rate {stats['hit_rate']:.0%}")
+    finally:
+        if server.returncode is None:
+            server.terminate()
+        await server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
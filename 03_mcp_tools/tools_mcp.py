@@ -1,15 +1,17 @@
 from mcp.server.fastmcp import FastMCP
+from tool_memo import cached_tool
 
 mcp = FastMCP("calculus_server")
 
-@mcp.tool()
+# Pure tools: repeated calls are answered from a cache, here and in the agent
+@cached_tool(mcp)
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers."""
     return a * b
 
 
 # Add an addition tool
-@mcp.tool()
+@cached_tool(mcp)
 def add(a: int, b: int) -> int:
     """Add two numbers"""
     return a + b
@@ -8,6 +8,7 @@ from langchain_mcp_adapters.tools import load_mcp_tools
 import asyncio
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from loop_lag_monitor import lag_monitor
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
@@ -47,7 +48,8 @@ graph_builder.add_node("tools", tools_node)
 graph_builder.add_conditional_edges("chatbot", tools_condition)
 graph_builder.add_edge("tools", "chatbot")
 graph_builder.add_edge(START, "chatbot")
-graph = graph_builder.compile()
+# LOOP_LAG_MONITOR=1 reports what blocks the event loop, see loop_lag_monitor.py
+graph = lag_monitor.instrument(graph_builder.compile())
 
 async def run_agent(message: str):
     response = await graph.ainvoke({"messages": [message]})
@@ -0,0 +1,109 @@
+"""
+Bytes and CPU per turn of the chat rendering on long tool loops, before and after agent_events.py.
+
+The stream of a turn is simulated: every loop streams an answer of TOKENS tokens
+("messages" mode, one token every TOKEN_INTERVAL seconds of simulated time), then the
+chatbot update with a tool call and the tools update with a ~1KB tool response.
+
+"before" is the rendering run_agent did: append to the response string and yield all of
+it on every chunk. "events" uses the typed events of agent_events.py with every change
+yielded, "events + throttle" also limits token yields to one every 50ms as run_agent does.
+"uv run benchmark_agent_events.py"
+"""
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+import agent_events
+from agent_events import AgentEventParser, Transcript
+
+LOOPS = [10, 50, 200]
+TOKENS = 60
+TOKEN_INTERVAL = 0.02
+
+
+def make_stream(loops: int) -> list[tuple[str, object, float]]:
+    """(stream_mode, chunk, simulated arrival time) of a whole turn"""
+    stream = []
+    now = 0.0
+    for loop in range(loops):
+        tokens = [f"word{i} " for i in range(TOKENS)]
+        for token in tokens:
+            now += TOKEN_INTERVAL
+            stream.append(("messages", (AIMessageChunk(content=token), {}), now))
+        tool_call = {"name": "add", "args": {"a": loop, "b": 7}, "id": f"call{loop}", "type": "tool_call"}
+        stream.append(("updates", {"chatbot": {"messages": [AIMessage(content="".join(tokens), tool_calls=[tool_call])]}}, now))
+        now += 0.5
+        response = ToolMessage(content="x" * 1024, name="add", tool_call_id=f"call{loop}")
+        stream.append(("updates", {"tools": {"messages": [response]}}, now))
+    return stream
+
+
+def render_like_before(stream) -> list[str]:
+    yielded = []
+    yielded_response = ""
+    streaming_content = False
+    for stream_mode, chunk, _ in stream:
+        if stream_mode == "messages":
+            message = chunk[0]
+            if message.content:
+                if not streaming_content:
+                    yielded_response += "Content: "
+                    streaming_content = True
+                yielded_response += message.content
+                yielded.append(yielded_response)
+            continue
+
+        if "chatbot" in chunk:
+            if streaming_content:
+                yielded_response += "\n \n"
+                streaming_content = False
+            tool_calls = chunk["chatbot"]["messages"][0].tool_calls
+            if len(tool_calls):
+                yielded_response += f"Tool calls: {tool_calls}"
+                yielded_response += "\n \n"
+        if "tools" in chunk:
+            yielded_response += f"Tool responses: {list(map(lambda row: {row.name: row.content}, chunk['tools']['messages']))}"
+            yielded_response += "\n \n"
+        yielded.append(yielded_response)
+    return yielded
+
+
+def render_with_events(stream, min_interval: float) -> list[str]:
+    clock = {"now": 0.0}
+    real_monotonic = agent_events.time.monotonic
+    agent_events.time.monotonic = lambda: clock["now"]
+    try:
+        yielded = []
+        parser = AgentEventParser()
+        transcript = Transcript(min_interval)
+        for stream_mode, chunk, arrival in stream:
+            clock["now"] = arrival
+            if transcript.add(parser.parse(chunk, stream_mode)):
+                yielded.append(transcript.text)
+        if transcript.pending:
+            yielded.append(transcript.text)
+        return yielded
+    finally:
+        agent_events.time.monotonic = real_monotonic
+
+
+def measure(render, stream) -> tuple[float, int, int, str]:
+    start = time.process_time()
+    yielded = render(stream)
+    cpu_ms = 1000 * (time.process_time() - start)
+    return cpu_ms, len(yielded), sum(len(text) for text in yielded), yielded[-1]
+
+
+if __name__ == "__main__":
+    print(f"{'loops':>6}  {'renderer':<20}{'yields':>8}{'bytes yielded':>15}{'final bytes':>13}{'cpu ms':>9}")
+    for loops in LOOPS:
+        stream = make_stream(loops)
+        results = {
+            "before": measure(render_like_before, stream),
+            "events": measure(lambda s: render_with_events(s, 0.0), stream),
+            "events + throttle": measure(lambda s: render_with_events(s, 0.05), stream),
+        }
+        assert len({final for _, _, _, final in results.values()}) == 1, "renderers disagree"
+        for name, (cpu_ms, yields, yielded_bytes, final) in results.items():
+            print(f"{loops:>6}  {name:<20}{yields:>8}{yielded_bytes:>15}{len(final):>13}{cpu_ms:>9.1f}")
@@ -0,0 +1,63 @@
+"""
+Per-turn overhead of building the chat model with and without BoundModelCache.
+
+Only the model construction and tool binding are measured, the LLM is never called,
+so a dummy OPENAI_API_KEY is enough: "uv run benchmark_bound_model_cache.py"
+"""
+import os
+import time
+
+from langchain.chat_models import init_chat_model
+from langchain_core.tools import tool
+
+from bound_model_cache import BoundModelCache
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+TURNS = 500
+
+
+@tool
+def multiply(a: int, b: int) -> int:
+    """Multiply two numbers."""
+    return a * b
+
+
+@tool
+def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    return a + b
+
+
+@tool
+def execute_sql_query(sql_query: str, db_path: str = "data.db") -> str:
+    """Execute a SQL query against the sales database and return the rows."""
+    return ""
+
+
+@tool
+def get_github_issue(repo_owner: str, repo_name: str, issue_id: int) -> dict:
+    """Get a GitHub issue by ID."""
+    return {}
+
+
+tools = [multiply, add, execute_sql_query, get_github_issue]
+
+
+def per_turn_ms(build_model) -> float:
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        build_model()
+    return 1000 * (time.perf_counter() - start) / TURNS
+
+
+if __name__ == "__main__":
+    uncached = per_turn_ms(lambda: init_chat_model("gpt-4o-mini").bind_tools(tools))
+
+    cache = BoundModelCache()
+    cached = per_turn_ms(lambda: cache.get("gpt-4o-mini", tools))
+
+    print(f"{TURNS} turns, {len(tools)} tools")
+    print(f"init_chat_model + bind_tools: {uncached:.3f} ms/turn")
+    print(f"BoundModelCache.get:          {cached:.3f} ms/turn (hits={cache.hits}, misses={cache.misses})")
+    print(f"Speedup: {uncached / cached:.0f}x")
@@ -0,0 +1,87 @@
+"""
+Compare MCP handshakes per conversation turn with and without McpSessionPool.
+
+Start the calculus server first (03_mcp_tools/tools_mcp.py), then run
+"uv run benchmark_session_pool.py". No LLM is called: every graph step is simulated
+with the same session / tool loading calls the chatbot and tools nodes do.
+"""
+import asyncio
+import time
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from mcp_session_pool import McpSessionPool
+
+server_name = "calculus_server"
+client = MultiServerMCPClient(
+    {
+        server_name: {
+            "url": "http://127.0.0.1:8000/mcp",
+            "transport": "streamable_http",
+        },
+    }
+)  # type: ignore
+
+TURNS = 20
+# Each tool loop is a chatbot step followed by a tools step, plus the final chatbot answer
+TOOL_LOOPS_PER_TURN = 2
+
+
+async def call_add(tools):
+    add = next(tool for tool in tools if tool.name == "add")
+    await add.ainvoke({"a": 5, "b": 7})
+
+
+async def fresh_session_turn(stats: dict):
+    for _ in range(TOOL_LOOPS_PER_TURN):
+        # chatbot node
+        async with client.session(server_name) as session:
+            await load_mcp_tools(session)
+            stats["handshakes"] += 1
+            stats["tool_list_requests"] += 1
+
+        # tools node
+        async with client.session(server_name) as session:
+            tools = await load_mcp_tools(session)
+            stats["handshakes"] += 1
+            stats["tool_list_requests"] += 1
+            await call_add(tools)
+
+    async with client.session(server_name) as session:
+        await load_mcp_tools(session)
+        stats["handshakes"] += 1
+        stats["tool_list_requests"] += 1
+
+
+async def pooled_turn(pool: McpSessionPool):
+    for _ in range(TOOL_LOOPS_PER_TURN):
+        await pool.get_tools(server_name)
+        await call_add(await pool.get_tools(server_name))
+    await pool.get_tools(server_name)
+
+
+async def main():
+    stats = {"handshakes": 0, "tool_list_requests": 0}
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        await fresh_session_turn(stats)
+    fresh_elapsed = time.perf_counter() - start
+
+    pool = McpSessionPool(client)
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        await pooled_turn(pool)
+    pooled_elapsed = time.perf_counter() - start
+    await pool.aclose()
+
+    print(f"{TURNS} turns, {TOOL_LOOPS_PER_TURN} tool loops per turn")
+    print(f"{'mode':<15}{'handshakes/turn':>18}{'tools/list/turn':>18}{'ms/turn':>12}")
+    print(f"{'fresh session':<15}{stats['handshakes'] / TURNS:>18.2f}{stats['tool_list_requests'] / TURNS:>18.2f}{1000 * fresh_elapsed / TURNS:>12.1f}")
+    print(f"{'pooled':<15}{pool.handshakes / TURNS:>18.2f}{pool.tool_list_requests / TURNS:>18.2f}{1000 * pooled_elapsed / TURNS:>12.1f}")
+    saved = stats["handshakes"] - pool.handshakes
+    print(f"Handshakes saved per turn: {saved / TURNS:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
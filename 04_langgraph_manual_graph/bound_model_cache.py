@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class BoundModelCache:
+    """
+    Process-wide cache of chat models with tools already bound, keyed by
+    (model id, tool-schema fingerprint).
+
+    One base model is created per model id, so every binding reuses its HTTP
+    connection pool. When the tool set of a model changes the old binding is evicted.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._base_models: dict[str, BaseChatModel] = {}
+        self._bound_models: OrderedDict[tuple[str, str], Runnable] = OrderedDict()
+        # id(tool) -> (tool, fingerprint), the tool is kept so its id is not reused
+        self._tool_fingerprints: dict[int, tuple[BaseTool, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str, tools: list[BaseTool]) -> Runnable:
+        with self._lock:
+            key = (model, self.fingerprint(tools))
+            bound_model = self._bound_models.get(key)
+            if bound_model is not None:
+                self._bound_models.move_to_end(key)
+                self.hits += 1
+                return bound_model
+
+            self.misses += 1
+
+            # The tool set of this model changed, the old binding will not be used again
+            for stale_key in [k for k in self._bound_models if k[0] == model]:
+                del self._bound_models[stale_key]
+
+            base_model = self._base_models.get(model)
+            if base_model is None:
+                base_model = init_chat_model(model)
+                self._base_models[model] = base_model
+
+            bound_model = base_model.bind_tools(tools)
+            self._bound_models[key] = bound_model
+            while len(self._bound_models) > self.maxsize:
+                self._bound_models.popitem(last=False)
+
+            return bound_model
+
+    def fingerprint(self, tools: list[BaseTool]) -> str:
+        digest = hashlib.sha256()
+        for tool in tools:
+            digest.update(self._tool_fingerprint(tool).encode())
+        return digest.hexdigest()
+
+    def clear(self):
+        with self._lock:
+            self._bound_models.clear()
+            self._tool_fingerprints.clear()
+
+    def _tool_fingerprint(self, tool: BaseTool) -> str:
+        # The schema is only serialized the first time a tool object is seen
+        cached = self._tool_fingerprints.get(id(tool))
+        if cached is not None and cached[0] is tool:
+            return cached[1]
+
+        if len(self._tool_fingerprints) > 32 * self.maxsize:
+            self._tool_fingerprints.clear()
+
+        schema = json.dumps(convert_to_openai_tool(tool), sort_keys=True, default=str)
+        fingerprint = hashlib.sha256(schema.encode()).hexdigest()
+        self._tool_fingerprints[id(tool)] = (tool, fingerprint)
+        return fingerprint
+
+
+bound_models = BoundModelCache()
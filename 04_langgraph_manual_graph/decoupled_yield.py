@@ -1,13 +1,17 @@
 from typing import Annotated
 from typing_extensions import TypedDict
-from langchain.chat_models import init_chat_model
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_mcp_adapters.tools import load_mcp_tools
 import asyncio
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from loop_lag_monitor import lag_monitor
+from mcp_session_pool import McpSessionPool
+from bound_model_cache import bound_models
+from tool_memo import ToolMemoizer
+from turn_metrics import turn_metrics
+from agent_events import AgentEventParser, Transcript, render
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
@@ -21,24 +25,24 @@ client = MultiServerMCPClient(
         },
     }
 )  # type: ignore
+session_pool = McpSessionPool(client)
+# Repeated calls to the tools the server marks as pure are answered from a cache
+tool_memoizer = ToolMemoizer()
 
 
 # Define agent nodes
 async def chatbot(state: State):
-    # Load tools within a managed session
-    async with client.session("calculus_server") as session:
-        tools = await load_mcp_tools(session)
+    # Tools come from a long-lived session, loaded once and cached by the pool
+    tools = tool_memoizer.wrap(await session_pool.get_tools("calculus_server"))
 
-        # Create model with tools - use async invoke
-        model = init_chat_model("gpt-4o-mini").bind_tools(tools)
-        response = await model.ainvoke(state["messages"])
-        return {"messages": [response]}
+    # Reuse the model already bound to these tools - use async invoke
+    model = bound_models.get("gpt-4o-mini", tools)
+    response = await model.ainvoke(state["messages"])
+    return {"messages": [response]}
 
 async def tools(state: State):
-    async with client.session("calculus_server") as session:
-        tools = await load_mcp_tools(session)
-        tool_node = ToolNode(tools=tools)
-        return await tool_node.ainvoke(state)
+    tool_node = ToolNode(tools=tool_memoizer.wrap(await session_pool.get_tools("calculus_server")))
+    return await tool_node.ainvoke(state)
 
 # Build graph
 graph_builder = StateGraph(State)
@@ -47,35 +51,34 @@ graph_builder.add_node("chatbot", chatbot)
 graph_builder.add_node("tools", tools)
 graph_builder.add_conditional_edges("chatbot", tools_condition)
 graph_builder.add_edge("tools", "chatbot")
-graph = graph_builder.compile()
-
-async def run_agent(message: str, _history = []):
-    yielded_response = ""
-    async for async_stream_response in graph.astream({"messages": [message]}):
-        if "chatbot" in async_stream_response:
-            tool_calls = async_stream_response["chatbot"]["messages"][0].tool_calls
-            if len(tool_calls):
-                yielded_response += f"Tool calls: {tool_calls}"
-                yielded_response += "\n \n"
-
-            content = async_stream_response["chatbot"]["messages"][0].content
-            if content:
-                yielded_response += f"Content: {content}"
-                yielded_response += "\n \n"
-
-
-        if 'tools' in async_stream_response:
-            yielded_response += f"Tool responses: {list(map(lambda row: {row.name: row.content}, async_stream_response['tools']['messages']))}"
-            yielded_response += "\n \n"
-            
-        yield yielded_response
+# LOOP_LAG_MONITOR=1 reports what blocks the event loop, see loop_lag_monitor.py
+graph = lag_monitor.instrument(graph_builder.compile())
+
+async def run_agent(message: str, _history = [], deltas: bool = False):
+    """
+    Yields the text of the turn so far for gr.ChatInterface, or with deltas=True only the new text.
+    LLM tokens are pushed as they arrive ("messages"), tool calls and results when their node ends ("updates").
+    """
+    parser = AgentEventParser()
+    transcript = Transcript()
+    turn = turn_metrics.start()
+    async for stream_mode, chunk in graph.astream({"messages": [message]}, stream_mode=["messages", "updates"]):
+        turn.observe(stream_mode, chunk)
+        events = parser.parse(chunk, stream_mode)
+        if deltas:
+            if delta := render(events):
+                yield delta
+        elif transcript.add(events):
+            yield transcript.text
+    turn_metrics.finish(turn)
+    if transcript.pending:
+        yield transcript.text
 
 async def consume_agent_responses():
     """Example of how to consume yielded responses from outside"""
     print("Starting agent execution...")
-    async for yielded_data in run_agent("Use the tools to calculate 5+7."):
-        print(f"Yielded: {yielded_data}")
-        print("---")
+    async for delta in run_agent("Use the tools to calculate 5+7.", deltas=True):
+        print(delta, end="", flush=True)
     print("Agent execution completed!")
 
 if __name__ == "__main__":
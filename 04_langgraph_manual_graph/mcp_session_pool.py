@@ -0,0 +1,155 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import mcp.types
+from mcp import ClientSession
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+
+@dataclass
+class PooledSession:
+    session: ClientSession
+    task: asyncio.Task
+    close_event: asyncio.Event
+    last_checked: float = field(default_factory=time.monotonic)
+
+
+class McpSessionPool:
+    """
+    Keeps one long-lived MCP session per server configured in a MultiServerMCPClient.
+
+    The tools loaded from each session are cached and only reloaded when the server
+    sends a tools/list_changed notification or the session has to be reopened.
+    """
+
+    def __init__(
+        self,
+        client: MultiServerMCPClient,
+        health_check_interval: float = 30.0,
+        ping_timeout: float = 5.0,
+    ):
+        self.client = client
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+
+        # Counters, used by the benchmark to show how many round trips are saved
+        self.handshakes = 0
+        self.tool_list_requests = 0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sessions: dict[str, PooledSession] = {}
+        self._tools: dict[str, list[BaseTool]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def session(self, server_name: str) -> ClientSession:
+        """Return a live, initialized session for the server, opening it if needed"""
+        self._check_loop()
+        async with self._locks.setdefault(server_name, asyncio.Lock()):
+            pooled = self._sessions.get(server_name)
+            if pooled is not None and not await self._is_healthy(pooled):
+                await self._close(server_name)
+                pooled = None
+
+            if pooled is None:
+                pooled = await self._open(server_name)
+                self._sessions[server_name] = pooled
+
+            return pooled.session
+
+    async def get_tools(self, server_name: str) -> list[BaseTool]:
+        """Return the (cached) LangChain tools of the server, bound to the pooled session"""
+        session = await self.session(server_name)
+        if server_name not in self._tools:
+            self._tools[server_name] = await load_mcp_tools(session)
+            self.tool_list_requests += 1
+        return self._tools[server_name]
+
+    def invalidate_tools(self, server_name: str | None = None):
+        if server_name is None:
+            self._tools.clear()
+        else:
+            self._tools.pop(server_name, None)
+
+    async def aclose(self):
+        for server_name in list(self._sessions):
+            await self._close(server_name)
+
+    def _check_loop(self):
+        # Sessions and locks belong to the loop that created them, e.g. each asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sessions.clear()
+            self._tools.clear()
+            self._locks.clear()
+
+    async def _open(self, server_name: str) -> PooledSession:
+        if server_name not in self.client.connections:
+            msg = f"Couldn't find a server with name '{server_name}', expected one of '{list(self.client.connections.keys())}'"
+            raise ValueError(msg)
+
+        connection = dict(self.client.connections[server_name])
+        session_kwargs = dict(connection.get("session_kwargs") or {})
+        session_kwargs["message_handler"] = self._message_handler(server_name)
+        connection["session_kwargs"] = session_kwargs
+
+        ready: asyncio.Future[ClientSession] = asyncio.get_running_loop().create_future()
+        close_event = asyncio.Event()
+
+        # The transports use anyio task groups, so the session has to be entered and
+        # exited from the same task. That task lives as long as the pooled session.
+        async def hold_session():
+            try:
+                async with create_session(connection) as session:  # type: ignore
+                    await session.initialize()
+                    ready.set_result(session)
+                    await close_event.wait()
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+
+        task = asyncio.create_task(hold_session())
+        session = await ready
+        self.handshakes += 1
+        self._tools.pop(server_name, None)
+        return PooledSession(session=session, task=task, close_event=close_event)
+
+    async def _close(self, server_name: str):
+        pooled = self._sessions.pop(server_name, None)
+        self._tools.pop(server_name, None)
+        if pooled is None:
+            return
+
+        pooled.close_event.set()
+        try:
+            await asyncio.wait_for(pooled.task, timeout=self.ping_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pooled.task.cancel()
+
+    async def _is_healthy(self, pooled: PooledSession) -> bool:
+        if pooled.task.done():
+            return False
+
+        if time.monotonic() - pooled.last_checked < self.health_check_interval:
+            return True
+
+        try:
+            await asyncio.wait_for(pooled.session.send_ping(), timeout=self.ping_timeout)
+        except Exception:
+            return False
+
+        pooled.last_checked = time.monotonic()
+        return True
+
+    def _message_handler(self, server_name: str):
+        async def handler(message):
+            if isinstance(message, mcp.types.ServerNotification) and isinstance(
+                message.root, mcp.types.ToolListChangedNotification
+            ):
+                self._tools.pop(server_name, None)
+
+        return handler
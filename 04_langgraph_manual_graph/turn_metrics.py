@@ -0,0 +1,83 @@
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+
+from agent_events import HIDDEN_NODES
+
+
+@dataclass
+class TurnTiming:
+    started: float = field(default_factory=time.perf_counter)
+    # First LLM token (content or tool call) streamed to the user
+    first_token: float | None = None
+    # First node update, which is when the user saw something before token streaming
+    first_update: float | None = None
+    finished: float | None = None
+
+    def mark_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def mark_update(self):
+        if self.first_update is None:
+            self.first_update = time.perf_counter()
+
+    def observe(self, stream_mode: str, chunk: Any):
+        """Mark the first token or update from a graph.astream chunk"""
+        if stream_mode == "updates" and not chunk.keys() <= HIDDEN_NODES:
+            self.mark_update()
+        elif stream_mode == "messages":
+            message = chunk[0]
+            if isinstance(message, AIMessageChunk) and (message.content or message.tool_call_chunks):
+                self.mark_token()
+
+    def elapsed_ms(self, moment: float | None) -> float | None:
+        return None if moment is None else 1000 * (moment - self.started)
+
+
+class TurnMetrics:
+    """
+    Time to first token of the last conversation turns, next to the time of the first
+    node update and the total time of the turn, so both latencies can be tracked.
+    """
+
+    def __init__(self, window: int = 200):
+        self._turns: deque[TurnTiming] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self) -> TurnTiming:
+        return TurnTiming()
+
+    def finish(self, turn: TurnTiming):
+        turn.finished = time.perf_counter()
+        with self._lock:
+            self._turns.append(turn)
+        logging.info(
+            "Turn: ttft=%s ms, first update=%s ms, total=%s ms",
+            _format_ms(turn.elapsed_ms(turn.first_token)),
+            _format_ms(turn.elapsed_ms(turn.first_update)),
+            _format_ms(turn.elapsed_ms(turn.finished)),
+        )
+
+    def stats(self) -> dict[str, float | int | None]:
+        with self._lock:
+            turns = list(self._turns)
+        stats: dict[str, float | int | None] = {"turns": len(turns)}
+        for name in ("first_token", "first_update", "finished"):
+            values = sorted(v for v in (turn.elapsed_ms(getattr(turn, name)) for turn in turns) if v is not None)
+            stats[f"{name}_p50_ms"] = statistics.median(values) if values else None
+            stats[f"{name}_p95_ms"] = values[min(len(values) - 1, int(0.95 * len(values)))] if values else None
+        return stats
+
+
+def _format_ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+turn_metrics = TurnMetrics()
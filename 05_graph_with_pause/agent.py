@@ -1,20 +1,23 @@
 from typing import Annotated, Literal
-import uuid
 from typing_extensions import TypedDict
-from langchain.chat_models import init_chat_model
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
-from langchain_mcp_adapters.tools import load_mcp_tools
-from langgraph.checkpoint.memory import InMemorySaver
-import langgraph.types
-from langchain_core.runnables import RunnableConfig
 from langgraph.types import interrupt, Command
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp_session_pool import McpSessionPool
+from bound_model_cache import bound_models
+from tool_memo import ToolMemoizer
+from turn_metrics import turn_metrics
+from agent_events import AgentEventParser, Transcript
+from sessions import thread_config, thread_id_for_session, thread_locks
+from sqlite_checkpointer import checkpointer_from_env
+from history_compaction import HistoryCompactor, llm_summarizer
+from tool_approval import ParallelToolRunner, approval_request, approved_calls, rejected_calls
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
-    accepted_tool_call: Literal["y", "n", None]
+    # Answer to the approval interrupt, "y", "n" or one y/n per tool call, see tool_approval.py
+    accepted_tool_call: str | None
 
 
 client = MultiServerMCPClient(
@@ -25,25 +28,29 @@ client = MultiServerMCPClient(
         },
     }
 )  # type: ignore
+session_pool = McpSessionPool(client)
+# Repeated calls to the tools the server marks as pure are answered from a cache
+tool_memoizer = ToolMemoizer()
+# Old turns are summarized and big tool outputs dropped once the history passes 8000 tokens
+history_compactor = HistoryCompactor(max_tokens=8000, summarize=llm_summarizer("gpt-4o-mini"))
+# Approved tool calls run concurrently, each one cancelled after 30 seconds
+tool_runner = ParallelToolRunner(default_timeout=30.0)
 
 
 # Define agent nodes
 async def chatbot(state: State):
-    # Load tools within a managed session
-    async with client.session("calculus_server") as session:
-        tools = await load_mcp_tools(session)
+    # Tools come from a long-lived session, loaded once and cached by the pool
+    tools = tool_memoizer.wrap(await session_pool.get_tools("calculus_server"))
 
-        # Create model with tools
-        model = init_chat_model("gpt-4o").bind_tools(tools)
-        response = await model.ainvoke(state["messages"])
+    # Reuse the model already bound to these tools
+    model = bound_models.get("gpt-4o", tools)
+    response = await model.ainvoke(state["messages"])
 
-        return {"messages": [response]}
+    return {"messages": [response]}
 
 async def tools(state: State):
-    async with client.session("calculus_server") as session:
-        tools = await load_mcp_tools(session)
-        tool_node = ToolNode(tools=tools)
-        return await tool_node.ainvoke(state)
+    tool_calls = approved_calls(state["accepted_tool_call"], state["messages"][-1].tool_calls)
+    return {"messages": await tool_runner.run(tool_memoizer.wrap(await session_pool.get_tools("calculus_server")), tool_calls)}
     
 # Edges
 def tools_condition(
@@ -58,30 +65,40 @@ def tools_condition(
         return "tool_calling_permission_node"
     return "__end__"
 
-def tool_calling_permission_edge(state: State) -> Literal["reject_tool_call_node","tools"]:
-    if state["accepted_tool_call"] == "y":
-        return "tools"
-    
-    return "reject_tool_call_node"
+def tool_calling_permission_edge(state: State) -> list[Literal["reject_tool_call_node","tools"]]:
+    # With approved and rejected calls both nodes run in the same step
+    tool_calls = state["messages"][-1].tool_calls
+    next_nodes: list[Literal["reject_tool_call_node","tools"]] = []
+    if approved_calls(state["accepted_tool_call"], tool_calls):
+        next_nodes.append("tools")
+    if rejected_calls(state["accepted_tool_call"], tool_calls):
+        next_nodes.append("reject_tool_call_node")
+    return next_nodes
     
 
 
 def reject_tool_call_node(state: State):
-    # Is returning the reject, this should be splitted later
-    return {"messages": {
-                'role': 'tool',
-                'name': state["messages"][-1].tool_calls[0]["name"],
-                'tool_call_id': state["messages"][-1].tool_calls[0]["id"],
-                'content': f'tool call rejected: {state["accepted_tool_call"]}'
-            }}
+    # Every rejected call gets its answer, so the model sees a result for each tool call
+    return {"messages": [
+        {
+            'role': 'tool',
+            'name': tool_call["name"],
+            'tool_call_id': tool_call["id"],
+            'content': f'tool call rejected: {answer}'
+        }
+        for tool_call, answer in rejected_calls(state["accepted_tool_call"], state["messages"][-1].tool_calls)
+    ]}
 
 def tool_calling_permission_node(state: State):
-    user_input = interrupt('Accept tool calling (y/n)?')
+    # A single interrupt for all the tool calls of the message
+    user_input = interrupt(approval_request(state["messages"][-1].tool_calls))
     return {"accepted_tool_call": user_input}
 
 # Build graph
 graph_builder = StateGraph(State)
-graph_builder.add_edge(START, "chatbot")
+graph_builder.add_edge(START, "compact_history")
+graph_builder.add_node("compact_history", history_compactor.node)
+graph_builder.add_edge("compact_history", "chatbot")
 graph_builder.add_node("chatbot", chatbot)
 
 graph_builder.add_conditional_edges("chatbot", tools_condition)
@@ -93,10 +110,11 @@ graph_builder.add_node("tools", tools)
 
 graph_builder.add_conditional_edges("tool_calling_permission_node", tool_calling_permission_edge)
 
-graph_builder.add_edge("reject_tool_call_node", "chatbot")
-graph_builder.add_edge("tools", "chatbot")
+graph_builder.add_edge("reject_tool_call_node", "compact_history")
+graph_builder.add_edge("tools", "compact_history")
 
-checkpointer = InMemorySaver()
+# CHECKPOINT_DB=checkpoints.db keeps the conversations in SQLite, see sqlite_checkpointer.py
+checkpointer = checkpointer_from_env()
 graph = graph_builder.compile(
     checkpointer=checkpointer # To use langgraph studio, you need to comment this line
 )
@@ -104,54 +122,36 @@ graph = graph_builder.compile(
 # The compiled graph is something like this
 # https://mermaid.live/edit#pako:eNqNUsGO2yAQ_RU0vSSS7brYJDFZ5dJ8wp66rixig01LwMK43W2Uf19MUrerbKOeYJj33rwZ5gS1aThQiOO41LXRQra01AgJZX7WHbMuRAjVo_3BKVJSc2ZLHeCtZX2HHvfbUpeuqgbn4VW1eHrod3P08LHffV1SSoW0g5uAXtUdjFtcz-X05oxRVc2Ul2-rntujHAZpdKW9ucW9ZGBb_o3XrppxF9q7r3O1IcgOy4t1rpvZeLjPthW7uJ4bQnG8Q1fv27_6QXHiE1f6beJeE9t_NnFT7J7MpdC7Ov_JDSOZscNtq34aw54L1HDBRuWQkErRDwKLVIho2o2447LtHP2U4DeE8PsBHpue1dK90PQNYJrzVe4gDitRQwStlQ1QZ0cewdH7ZVMIp2khS3AdP_ISqL82zH4vodRnz-mZ_mLM8TfNmrHtgAqmBh-NfcMc30vmN_cPxP8Yt5_NqB1QEhSAnuAZKN7kCcnX6Wa9zrKc4E0EL0ALkmRFvkpxSoocF8U5gl-hYpqQFVmnKc5wscGrjJDzK5IDMEw
 
-config = RunnableConfig({"configurable": {"thread_id": uuid.uuid4()}})
+# Thread of the scripts, the Gradio interface passes one thread per browser session
+default_thread_id = thread_id_for_session(None)
 
-async def run_agent(message: str, comand: Command | None = None):
-    yielded_response = ""
+async def run_agent(message: str, comand: Command | None = None, thread_id: str = default_thread_id):
     stream_message = State({"messages": [message], "accepted_tool_call": None}) if comand is None else comand
-    async for async_stream_response in graph.astream(stream_message, config):
-        if "chatbot" in async_stream_response:
-            tool_calls = async_stream_response["chatbot"]["messages"][0].tool_calls
-            if len(tool_calls):
-                yielded_response += f"Tool calls: {tool_calls}"
-                yielded_response += "\n \n"
-
-            content = async_stream_response["chatbot"]["messages"][0].content
-            if content:
-                yielded_response += f"Content: {content}"
-                yielded_response += "\n \n"
-
-
-        if 'tools' in async_stream_response:
-            yielded_response += f"Tool responses: {list(map(lambda row: {row.name: row.content}, async_stream_response['tools']['messages']))}"
-            yielded_response += "\n \n"
-
-        interrupt_condition = ("__interrupt__" in async_stream_response) and (type(async_stream_response["__interrupt__"]) == tuple) and (len(async_stream_response["__interrupt__"]) == 1) and (type(async_stream_response["__interrupt__"][0]) == langgraph.types.Interrupt)
-        if interrupt_condition:
-            yielded_response += async_stream_response["__interrupt__"][0].value
-            yielded_response += "\n \n"
-
-        if "tool_calling_permission_node" in async_stream_response:
-            yielded_response += f"You responded: {async_stream_response['tool_calling_permission_node']['accepted_tool_call']}"
-            yielded_response += "\n \n"
-
-        if "reject_tool_call_node" in async_stream_response:
-            yielded_response += f"Rejected tool calling: {async_stream_response['reject_tool_call_node']['messages']['name']}"
-            yielded_response += "\n \n"
-
-
-        yield yielded_response
-
-async def run_agent_with_stop(message:str, history: list):
+    # LLM tokens are pushed as they arrive ("messages"), tool calls, approvals and results when their node ends ("updates"),
+    # each chunk becomes typed events that only render their own text, see agent_events.py
+    parser = AgentEventParser()
+    transcript = Transcript()
+    turn = turn_metrics.start()
+    async for stream_mode, chunk in graph.astream(stream_message, thread_config(thread_id), stream_mode=["messages", "updates"]):
+        turn.observe(stream_mode, chunk)
+        if transcript.add(parser.parse(chunk, stream_mode)):
+            yield transcript.text
+    turn_metrics.finish(turn)
+    if transcript.pending:
+        yield transcript.text
+
+async def run_agent_with_stop(message:str, history: list, thread_id: str = default_thread_id):
     """Example of how to consume yielded responses from outside"""
     
-    next_node = (await graph.aget_state(config)).next
-    is_human_accepting_tool_call = next_node != ('tool_calling_permission_node',)
-    if is_human_accepting_tool_call:
-        async for yielded_data in run_agent(message):
-            yield yielded_data
-
-    else:
-        command = Command(resume=message)
-        async for yielded_data in run_agent("", command):
-            yield yielded_data
\ No newline at end of file
+    # Checking the state and resuming must not interleave with another run of the same thread
+    async with thread_locks.hold(thread_id):
+        next_node = (await graph.aget_state(thread_config(thread_id))).next
+        is_human_accepting_tool_call = next_node != ('tool_calling_permission_node',)
+        if is_human_accepting_tool_call:
+            async for yielded_data in run_agent(message, thread_id=thread_id):
+                yield yielded_data
+
+        else:
+            command = Command(resume=message)
+            async for yielded_data in run_agent("", command, thread_id):
+                yield yielded_data
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Per-step write latency and memory of InMemorySaver and SQLiteCheckpointer over a long run.
+
+A chat graph (one node that answers every user message) runs TURNS turns. Users come and
+go: every conversation lasts CONVERSATION_TURNS turns on its own thread and ACTIVE of them
+are going on at once, so the checkpointer keeps seeing new threads, like a deployment where
+every browser session gets one. The SQLite checkpointer keeps the last 10 checkpoints of a
+thread and the MAX_THREADS most recently used threads.
+
+Each checkpointer runs in its own process, so their resident memory (RSS) can be compared.
+Write latency is the time of each put() / put_writes() call.
+"uv run benchmark_checkpointer.py"
+"uv run benchmark_checkpointer.py --turns 20000"
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Annotated
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from typing_extensions import TypedDict
+
+from sqlite_checkpointer import SQLiteCheckpointer
+
+CONVERSATION_TURNS = 10
+ACTIVE = 100
+MAX_THREADS = 1000
+CHECKPOINTS = [10_000, 25_000, 50_000, 100_000]
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def chatbot(state: State):
+    return {"messages": [AIMessage(content=f"Answer number {len(state['messages'])} to: {state['messages'][-1].content}")]}
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def timed(checkpointer, latencies: list[float]):
+    """Records the duration of every put and put_writes of the checkpointer"""
+    for name in ("put", "put_writes"):
+        method = getattr(checkpointer, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        setattr(checkpointer, name, wrapper)
+
+
+def run(saver: str, turns: int) -> None:
+    if saver == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "checkpoints.db")
+        checkpointer = SQLiteCheckpointer(path, max_threads=MAX_THREADS, compact_interval=10.0)
+    else:
+        checkpointer = InMemorySaver()
+    latencies: list[float] = []
+    timed(checkpointer, latencies)
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_edge(START, "chatbot")
+    graph = graph_builder.compile(checkpointer=checkpointer)
+
+    start = time.perf_counter()
+    for turn in range(1, turns + 1):
+        # ACTIVE conversations interleaved, each one replaced by a new thread after CONVERSATION_TURNS turns
+        slot = turn % ACTIVE
+        conversation = (turn // ACTIVE) // CONVERSATION_TURNS * ACTIVE + slot
+        config = {"configurable": {"thread_id": f"thread-{conversation}"}}
+        graph.invoke({"messages": [("user", f"message {turn} of a conversation about pizza and pasta")]}, config)
+
+        if turn in CHECKPOINTS or turn == turns:
+            quantiles = statistics.quantiles(latencies, n=100)
+            size = ""
+            if saver == "sqlite":
+                stats = checkpointer.stats()
+                size = f"  db {stats['file_bytes'] / 2**20:6.1f} MB, {stats['threads']} threads, {stats['checkpoints']} checkpoints"
+            print(f"{saver:<7}{turn:>8} turns {time.perf_counter() - start:7.1f}s  rss {rss_mb():7.1f} MB  "
+                  f"write p50 {1e6 * quantiles[49]:6.0f} us p99 {1e6 * quantiles[98]:6.0f} us{size}", flush=True)
+            latencies.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100_000)
+    parser.add_argument("--saver", choices=["memory", "sqlite"], help="run only this checkpointer, in this process")
+    args = parser.parse_args()
+
+    if args.saver:
+        run(args.saver, args.turns)
+    else:
+        for saver in ("memory", "sqlite"):
+            subprocess.run([sys.executable, __file__, "--saver", saver, "--turns", str(args.turns)], check=True)
@@ -0,0 +1,65 @@
+"""
+Latency of a turn with several tool calls, run one after the other or with ParallelToolRunner.
+
+Each tool sleeps as long as a slow MCP call would. "sequential" runs the approved calls one
+by one, as when every call had its own approval and tools step; "parallel" is tool_approval.py,
+all calls at once with a timeout each. The last case has a call that hangs: the runner
+cancels it at its timeout and still answers the others.
+"uv run benchmark_tool_approval.py"
+"""
+import asyncio
+import time
+
+from langchain_core.tools import tool
+from langgraph.prebuilt import ToolNode
+
+from tool_approval import ParallelToolRunner
+
+
+@tool
+async def slow_tool(seconds: float) -> str:
+    """Answers after the given seconds"""
+    await asyncio.sleep(seconds)
+    return f"answered after {seconds}s"
+
+
+CASES = {
+    "3 calls": [0.2, 0.5, 0.3],
+    "5 calls": [0.2, 0.5, 0.3, 0.4, 0.1],
+    "5 calls, one hangs": [0.2, 0.5, 0.3, 0.4, 60.0],
+}
+TIMEOUT = 1.0
+
+
+def tool_calls(delays: list[float]) -> list[dict]:
+    return [{"name": "slow_tool", "args": {"seconds": delay}, "id": f"call_{i}", "type": "tool_call"} for i, delay in enumerate(delays)]
+
+
+async def sequential(calls: list[dict]) -> list:
+    tool_node = ToolNode([slow_tool])
+    messages = []
+    for call in calls:
+        messages += (await tool_node.ainvoke([call]))["messages"]
+    return messages
+
+
+async def main():
+    runner = ParallelToolRunner(default_timeout=TIMEOUT)
+    print(f"{'case':<22}{'sum of calls':>14}{'sequential':>12}{'parallel':>10}  results")
+    for name, delays in CASES.items():
+        calls = tool_calls(delays)
+        start = time.perf_counter()
+        if max(delays) < TIMEOUT:
+            await sequential(calls)
+            sequential_time = f"{time.perf_counter() - start:.2f}s"
+        else:
+            sequential_time = "hangs"
+        start = time.perf_counter()
+        messages = await runner.run([slow_tool], calls)
+        parallel_time = time.perf_counter() - start
+        errors = sum(message.status == "error" for message in messages)
+        print(f"{name:<22}{sum(delays):>13.1f}s{sequential_time:>12}{parallel_time:>9.2f}s  {len(messages) - errors} ok, {errors} timed out")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
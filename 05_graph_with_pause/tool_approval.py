@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import ToolNode
+
+APPROVED = "y"
+
+
+def approval_request(tool_calls: list[dict[str, Any]]) -> str:
+    """Question of the single interrupt that asks for every pending tool call"""
+    if len(tool_calls) == 1:
+        return "Accept tool calling (y/n)?"
+    calls = "\n".join(f"{i}. {call['name']}({call['args']})" for i, call in enumerate(tool_calls, 1))
+    return (
+        f"Accept tool calling?\n{calls}\n"
+        f"Answer y or n for all of them, or one y/n per call in order (e.g. {','.join('yn'[i % 2] for i in range(len(tool_calls)))})"
+    )
+
+
+def parse_decisions(answer: str, tool_calls: list[dict[str, Any]]) -> dict[str, str]:
+    """
+    Decision for each tool call id: "y" to run it, otherwise the answer of the user, which
+    goes back to the model as the reason of the rejection.
+
+    "y" approves every call and any other single answer rejects every call. With several
+    calls, one y/n per call separated by commas or spaces decides each one.
+    """
+    answer = (answer or "").strip()
+    parts = answer.replace(",", " ").split()
+    if len(tool_calls) > 1 and len(parts) == len(tool_calls) and all(part.lower() in ("y", "n") for part in parts):
+        return {call["id"]: APPROVED if part.lower() == "y" else "n" for call, part in zip(tool_calls, parts)}
+    return {call["id"]: APPROVED if answer == APPROVED else answer for call in tool_calls}
+
+
+def approved_calls(answer: str, tool_calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    decisions = parse_decisions(answer, tool_calls)
+    return [call for call in tool_calls if decisions[call["id"]] == APPROVED]
+
+
+def rejected_calls(answer: str, tool_calls: list[dict[str, Any]]) -> list[tuple[dict[str, Any], str]]:
+    """(tool call, answer of the user) of each rejected call"""
+    decisions = parse_decisions(answer, tool_calls)
+    return [(call, decisions[call["id"]]) for call in tool_calls if decisions[call["id"]] != APPROVED]
+
+
+class ParallelToolRunner:
+    """
+    Runs the approved tool calls of a turn concurrently, each one under its own timeout.
+
+    Every call goes through its own ToolNode run, so tool errors become error ToolMessages
+    as before, and a call over its timeout is cancelled and answered with an error
+    ToolMessage instead of holding the others. The turn takes as long as the slowest call.
+    timeouts overrides default_timeout for some tool names.
+    """
+
+    def __init__(self, default_timeout: float = 30.0, timeouts: dict[str, float] | None = None):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(tool_name, self.default_timeout)
+
+    async def run(self, tools: list[BaseTool], tool_calls: list[dict[str, Any]]) -> list[ToolMessage]:
+        tool_node = ToolNode(tools=tools)
+        return list(await asyncio.gather(*(self._run_call(tool_node, call) for call in tool_calls)))
+
+    async def _run_call(self, tool_node: ToolNode, call: dict[str, Any]) -> ToolMessage:
+        timeout = self.timeout_for(call["name"])
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(tool_node.ainvoke([{**call, "type": "tool_call"}]), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Tool call {call['name']} ({call['id']}) cancelled after {timeout}s")
+            return ToolMessage(
+                content=f"Error: {call['name']} did not answer in {timeout} seconds, the call was cancelled.",
+                name=call["name"],
+                tool_call_id=call["id"],
+                status="error",
+            )
+        logging.debug(f"Tool call {call['name']} took {1000 * (time.perf_counter() - start):.0f} ms")
+        return result["messages"][0]
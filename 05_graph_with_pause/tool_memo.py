@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from mcp.types import ToolAnnotations
+
+
+class MemoCache:
+    """
+    Results of pure or TTL-cacheable tools, an LRU of maxsize entries per tool, with the
+    hits and misses of each tool.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, OrderedDict[str, tuple[float | None, Any]]] = {}
+        self._counts: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool: str, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            counts = self._counts.setdefault(tool, [0, 0])
+            entries = self._entries.get(tool)
+            entry = entries.get(key) if entries else None
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                entries.move_to_end(key)  # type: ignore[union-attr]
+                counts[0] += 1
+                return True, entry[1]
+            if entry is not None:
+                del entries[key]  # type: ignore[union-attr]
+            counts[1] += 1
+            return False, None
+
+    def put(self, tool: str, key: str, value: Any, ttl: float | None, maxsize: int):
+        with self._lock:
+            entries = self._entries.setdefault(tool, OrderedDict())
+            entries[key] = (None if ttl is None else time.monotonic() + ttl, value)
+            entries.move_to_end(key)
+            while len(entries) > maxsize:
+                entries.popitem(last=False)
+
+    def clear(self, tool: str | None = None):
+        with self._lock:
+            if tool is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tool, None)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                tool: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                    "size": len(self._entries.get(tool, ())),
+                }
+                for tool, (hits, misses) in self._counts.items()
+            }
+
+
+# Shared by the server tools and the agent tools of the process
+tool_cache = MemoCache()
+
+
+def call_key(signature: inspect.Signature, args: tuple, kwargs: dict[str, Any]) -> str:
+    """The arguments with the defaults applied, so f(x) and f(x, default) share the entry"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return json.dumps(bound.arguments, sort_keys=True, default=str)
+
+
+def memoize(ttl: float | None = None, maxsize: int = 128, name: str | None = None, cache: MemoCache = tool_cache):
+    """
+    Serve repeated calls with the same arguments from the cache, forever for a pure
+    function (ttl=None) or for ttl seconds. Exceptions are not cached. Works on sync and
+    async functions and keeps the signature, so it can go under @mcp.tool().
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        tool = name or fn.__name__
+        signature = inspect.signature(fn)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = call_key(signature, args, kwargs)
+                found, value = cache.get(tool, key)
+                if not found:
+                    value = await fn(*args, **kwargs)
+                    cache.put(tool, key, value, ttl, maxsize)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = call_key(signature, args, kwargs)
+            found, value = cache.get(tool, key)
+            if not found:
+                value = fn(*args, **kwargs)
+                cache.put(tool, key, value, ttl, maxsize)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def cache_annotations(ttl: float | None = None) -> ToolAnnotations:
+    """
+    MCP tool annotations telling the clients the tool can be cached: "cacheable" and
+    "cacheTtlSeconds" (null for a pure tool) go with the standard hints in tools/list.
+    """
+    return ToolAnnotations(readOnlyHint=True, idempotentHint=True, cacheable=True, cacheTtlSeconds=ttl)  # type: ignore[call-arg]
+
+
+def cached_tool(mcp, ttl: float | None = None, maxsize: int = 128, **tool_kwargs):
+    """
+    @mcp.tool() for a pure (ttl=None) or TTL-cacheable tool: memoized on the server, and
+    announced as cacheable so memoize_tools() caches it in the agent too.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        return mcp.tool(annotations=cache_annotations(ttl), **tool_kwargs)(memoize(ttl, maxsize)(fn))
+
+    return decorator
+
+
+def memoize_tools(tools: list[BaseTool], maxsize: int = 128, cache: MemoCache = tool_cache) -> list[BaseTool]:
+    """
+    The tools, where the ones a server marked as cacheable (see cached_tool) are copies that
+    answer repeated calls from the cache instead of calling the server. Works with any
+    ToolNode, the cache is kept by tool name so new copies keep using it.
+    """
+    memoized = []
+    for tool in tools:
+        metadata = tool.metadata or {}
+        coroutine = getattr(tool, "coroutine", None)
+        if metadata.get("cacheable") and coroutine is not None:
+            cached = memoize(metadata.get("cacheTtlSeconds"), maxsize, name=tool.name, cache=cache)(coroutine)
+            tool = tool.model_copy(update={"coroutine": cached})
+        memoized.append(tool)
+    return memoized
+
+
+class ToolMemoizer:
+    """memoize_tools() of the last tool list seen, so the same list gives the same copies"""
+
+    def __init__(self, maxsize: int = 128, cache: MemoCache = tool_cache):
+        self.maxsize = maxsize
+        self.cache = cache
+        self._source: list[BaseTool] | None = None
+        self._memoized: list[BaseTool] = []
+
+    def wrap(self, tools: list[BaseTool]) -> list[BaseTool]:
+        if tools is not self._source:
+            self._memoized = memoize_tools(tools, self.maxsize, self.cache)
+            self._source = tools
+        return self._memoized
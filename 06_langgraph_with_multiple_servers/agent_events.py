@@ -0,0 +1,192 @@
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langgraph.types import Interrupt
+
+SEPARATOR = "\n \n"
+# Nodes that only rewrite the state (e.g. history_compaction.py), not part of the answer
+HIDDEN_NODES = {"compact_history"}
+
+
+@dataclass
+class ContentToken:
+    """A piece of the LLM answer streamed in "messages" mode"""
+    text: str
+    first: bool
+
+    def render(self) -> str:
+        return f"Content: {self.text}" if self.first else self.text
+
+
+@dataclass
+class ContentEnd:
+    """The streamed answer is complete"""
+
+    def render(self) -> str:
+        return SEPARATOR
+
+
+@dataclass
+class Content:
+    """A whole answer, when it was not streamed token by token"""
+    text: str
+    label: str = "Content: "
+
+    def render(self) -> str:
+        return f"{self.label}{self.text}{SEPARATOR}"
+
+
+@dataclass
+class ToolCalls:
+    calls: list[dict[str, Any]]
+
+    def render(self) -> str:
+        return f"Tool calls: {self.calls}{SEPARATOR}"
+
+
+@dataclass
+class ToolResults:
+    results: list[dict[str, Any]]
+
+    def render(self) -> str:
+        return f"Tool responses: {self.results}{SEPARATOR}"
+
+
+@dataclass
+class InterruptRequest:
+    value: Any
+
+    def render(self) -> str:
+        return f"{self.value}{SEPARATOR}"
+
+
+@dataclass
+class Approval:
+    answer: str
+
+    def render(self) -> str:
+        return f"You responded: {self.answer}{SEPARATOR}"
+
+
+@dataclass
+class Rejection:
+    tool_name: str
+
+    def render(self) -> str:
+        return f"Rejected tool calling: {self.tool_name}{SEPARATOR}"
+
+
+AgentEvent = ContentToken | ContentEnd | Content | ToolCalls | ToolResults | InterruptRequest | Approval | Rejection
+
+
+class AgentEventParser:
+    """
+    Turns graph.astream chunks ("updates" dicts, or ("messages"/"updates", chunk) pairs
+    with several stream modes) into typed events, each rendering only its own text.
+
+    It remembers whether the current answer was streamed, so the node update that
+    carries the same answer afterwards does not render it twice.
+    """
+
+    def __init__(self):
+        self._streaming = False
+
+    def parse(self, chunk: Any, stream_mode: str = "updates") -> list[AgentEvent]:
+        if stream_mode == "messages":
+            return self._parse_message(chunk[0])
+        if stream_mode == "updates":
+            return self._parse_update(chunk)
+        return []
+
+    def _parse_message(self, message: Any) -> list[AgentEvent]:
+        if not isinstance(message, AIMessageChunk) or not isinstance(message.content, str) or not message.content:
+            return []
+        first = not self._streaming
+        self._streaming = True
+        return [ContentToken(message.content, first)]
+
+    def _parse_update(self, update: dict[str, Any]) -> list[AgentEvent]:
+        events: list[AgentEvent] = []
+        for node_name, node_data in update.items():
+            if node_name == "__interrupt__":
+                events.extend(InterruptRequest(item.value) for item in node_data if isinstance(item, Interrupt))
+                continue
+            if node_name in HIDDEN_NODES or not isinstance(node_data, dict):
+                continue
+
+            if node_name == "reject_tool_call_node":
+                rejected = node_data["messages"]
+                events.extend(Rejection(message["name"]) for message in (rejected if isinstance(rejected, list) else [rejected]))
+                continue
+            if "accepted_tool_call" in node_data:
+                events.append(Approval(node_data["accepted_tool_call"]))
+            if node_data.get("chatbot_response"):
+                events.append(Content(str(node_data["chatbot_response"]), label=""))
+
+            messages = node_data.get("messages")
+            if not isinstance(messages, list):
+                continue
+            tool_results = [{message.name: message.content} for message in messages if isinstance(message, ToolMessage)]
+            if tool_results:
+                events.append(ToolResults(tool_results))
+            for message in messages:
+                if isinstance(message, AIMessage):
+                    events.extend(self._parse_ai_message(message))
+        return events
+
+    def _parse_ai_message(self, message: AIMessage) -> list[AgentEvent]:
+        events: list[AgentEvent] = []
+        if self._streaming:
+            events.append(ContentEnd())
+            self._streaming = False
+        elif message.content:
+            events.append(Content(str(message.content)))
+        if message.tool_calls:
+            events.append(ToolCalls(message.tool_calls))
+        return events
+
+
+def render(events: list[AgentEvent]) -> str:
+    return "".join(event.render() for event in events)
+
+
+class Transcript:
+    """
+    Text of a turn for gr.ChatInterface, which shows whatever the generator yielded last.
+
+    Events are appended as rendered deltas, joined only when the text is yielded. add()
+    says when that is worth it: right away for anything but answer tokens, and at most
+    every min_interval seconds for tokens, so a long answer does not copy the whole
+    transcript once per token.
+    """
+
+    def __init__(self, min_interval: float = 0.05):
+        self.min_interval = min_interval
+        self._parts: list[str] = []
+        self._text = ""
+        self._last_yield = 0.0
+
+    def add(self, events: list[AgentEvent]) -> bool:
+        """Append the events, True when the text should be yielded now"""
+        delta = render(events)
+        if not delta:
+            return False
+        self._parts.append(delta)
+        if any(not isinstance(event, ContentToken) for event in events):
+            return True
+        return time.monotonic() - self._last_yield >= self.min_interval
+
+    @property
+    def pending(self) -> bool:
+        """There are events not yielded yet"""
+        return bool(self._parts)
+
+    @property
+    def text(self) -> str:
+        if self._parts:
+            self._text += "".join(self._parts)
+            self._parts.clear()
+        self._last_yield = time.monotonic()
+        return self._text
@@ -0,0 +1,91 @@
+"""
+list_all_files on a synthetic monorepo of FILES files, the previous os.walk version against file_listing.py.
+
+The tree has PACKAGES packages, each with its sources and a node_modules directory four
+times bigger, and a .gitignore at the root that ignores node_modules/ and dist/, as
+a JavaScript monorepo. It is created once in the temp directory and reused.
+"os.walk" is the previous tool, every path of the tree in one list. "first page" is the
+first call of the new tool (500 files), "all pages" follows next_cursor until the end.
+The size is the one of the JSON the agent would receive.
+"uv run benchmark_file_listing.py"
+"""
+import json
+import os
+import tempfile
+import time
+
+from file_listing import list_files_page
+
+FILES = 500_000
+PACKAGES = 50
+PAGE = 500
+ROOT = os.path.join(tempfile.gettempdir(), f"file_listing_tree_{FILES}")
+
+
+def create_tree():
+    per_package = FILES // PACKAGES
+    sources = per_package // 5
+    for package in range(PACKAGES):
+        base = os.path.join(ROOT, "packages", f"pkg{package:03d}")
+        for i in range(per_package):
+            if i < sources:
+                path = os.path.join(base, "src", f"module{i % 20:02d}", f"file{i}.ts")
+            elif i < sources + 10:
+                path = os.path.join(base, "dist", f"bundle{i}.js")
+            else:
+                path = os.path.join(base, "node_modules", f"dep{i % 100:03d}", "lib", f"file{i}.js")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+    with open(os.path.join(ROOT, ".gitignore"), "w") as file:
+        file.write("node_modules/\ndist/\n*.log\n")
+    open(os.path.join(ROOT, ".ready"), "w").close()
+
+
+def old_list_all_files(directory: str) -> list[str]:
+    files = []
+    for root, dirs, filenames in os.walk(directory):
+        for filename in filenames:
+            files.append(os.path.join(root, filename))
+    return files
+
+
+def report(name: str, seconds: float, files: int, json_bytes: int):
+    print(f"{name:<12} {seconds:7.2f}s  {files:>8} files  {json_bytes / 1e6:8.2f} MB of JSON  (~{json_bytes // 4:,} tokens)")
+
+
+def main():
+    if not os.path.exists(os.path.join(ROOT, ".ready")):
+        print(f"Creating {FILES} files in {ROOT}...")
+        start = time.perf_counter()
+        create_tree()
+        print(f"Created in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    files = old_list_all_files(ROOT)
+    report("os.walk", time.perf_counter() - start, len(files), len(json.dumps(files)))
+
+    start = time.perf_counter()
+    page = list_files_page(ROOT, limit=PAGE)
+    report("first page", time.perf_counter() - start, page["row_count"], len(json.dumps(page)))
+
+    start = time.perf_counter()
+    pages = total = size = 0
+    cursor = None
+    while True:
+        page = list_files_page(ROOT, cursor=cursor, limit=PAGE)
+        pages += 1
+        total += page["row_count"]
+        size += len(json.dumps(page))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    report("all pages", time.perf_counter() - start, total, size)
+    print(f"{pages} pages, the ignored node_modules and dist directories are never entered")
+
+    start = time.perf_counter()
+    page = list_files_page(ROOT, pattern="packages/pkg042/**/*.ts", limit=PAGE)
+    report("glob page", time.perf_counter() - start, page["row_count"], len(json.dumps(page)))
+
+
+if __name__ == "__main__":
+    main()
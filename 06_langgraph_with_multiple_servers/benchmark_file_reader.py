@@ -0,0 +1,87 @@
+"""
+read_file on a big log file, the previous whole-file read against the ranged reads of file_reader.py.
+
+A log of SIZE_MB MB is created once in the temp directory. "file.read()" is the previous
+tool, the whole file as one string. "first range" is the first line range of the new
+tool, which builds the line index; "line ranges" are READS ranges of 100 lines at random
+positions after it, and "byte ranges" READS ranges of 4 KB. The memory is the peak of
+the Python allocations (tracemalloc), the pages of the mapping are not counted: they are
+the page cache, shared and released by the kernel.
+"uv run benchmark_file_reader.py"
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from file_reader import FileReader
+
+SIZE_MB = 300
+READS = 1000
+PATH = os.path.join(tempfile.gettempdir(), f"file_reader_{SIZE_MB}mb.log")
+
+
+def create_log():
+    line = "2025-09-18 12:00:00,000 INFO request id={} path=/api/orders status=200 duration_ms={}\n"
+    with open(PATH + ".tmp", "w") as file:
+        written, i = 0, 0
+        while written < SIZE_MB * 1024 * 1024:
+            chunk = "".join(line.format(i + j, (i + j) % 997) for j in range(10_000))
+            file.write(chunk)
+            written += len(chunk)
+            i += 10_000
+    os.replace(PATH + ".tmp", PATH)
+
+
+def measure(name: str, fn) -> float:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<14} {1000 * seconds:9.2f} ms  peak memory {peak / 1e6:8.1f} MB")
+    return seconds
+
+
+def old_read_file(file_path: str) -> dict[str, str]:
+    with open(file_path, "r") as file:
+        return {"content": file.read()}
+
+
+def main():
+    if not os.path.exists(PATH):
+        print(f"Creating a {SIZE_MB} MB log in {PATH}...")
+        create_log()
+
+    measure("file.read()", lambda: old_read_file(PATH))
+
+    reader = FileReader()
+    first = reader.read_lines(PATH, 1, 100)
+    total_lines = first["total_lines"]
+    reader = FileReader()
+    measure("first range", lambda: reader.read_lines(PATH, 1, 100))
+    print(f"{total_lines:,} lines, index of {8 * total_lines / 1e6:.1f} MB")
+
+    for name, read in {
+        "line ranges": lambda: reader.read_lines(PATH, (line := random.randint(1, total_lines)), line + 99),
+        "byte ranges": lambda: reader.read_bytes(PATH, random.randint(0, SIZE_MB * 1024 * 1024), 4096),
+    }.items():
+        latencies = []
+        for _ in range(READS):
+            start = time.perf_counter()
+            read()
+            latencies.append(time.perf_counter() - start)
+        print(f"{name:<14} p50 {1e6 * statistics.median(latencies):7.1f} us  "
+              f"p99 {1e6 * statistics.quantiles(latencies, n=100)[-1]:7.1f} us  ({READS} reads)")
+    print(f"line index built {reader.index_builds} time(s)")
+
+    capped = reader.read_lines(PATH)
+    print(f"whole file asked: {len(capped['content']) / 1024:.0f} KB returned, "
+          f"truncated={capped['truncated']}, next_start_line={capped['next_start_line']}")
+
+
+if __name__ == "__main__":
+    main()
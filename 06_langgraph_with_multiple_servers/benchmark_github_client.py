@@ -0,0 +1,154 @@
+"""
+Latency and rate limit use of repeated get_github_issue calls, with urllib or GitHubClient.
+
+A local stub of the GitHub API answers the issues with an ETag, answers a matching
+If-None-Match with a 304 and sends the X-RateLimit-* headers of a small limit (304s do not
+count, as on GitHub). Every new connection costs HANDSHAKE seconds, the TCP + TLS setup
+to api.github.com. "urllib" is the previous get_github_issue, a new connection per call;
+"GitHubClient" keeps its connections alive, revalidates with the ETag and waits for the
+reset when the limit is exhausted instead of failing with a 403.
+The "cold" round asks for COLD different issues, more than the limit allows in a window.
+"uv run benchmark_github_client.py"
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from github_client import GitHubClient
+
+CALLS = 200
+ISSUES = 10
+HANDSHAKE = 0.03
+RATE_LIMIT = 60
+RATE_WINDOW = 2.0
+COLD = 150
+
+
+class RateLimit:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset_at = time.time() + RATE_WINDOW
+        self.used = 0
+
+    def take(self, counts: bool) -> tuple[bool, dict[str, str]]:
+        with self.lock:
+            if time.time() >= self.reset_at:
+                self.reset_at, self.used = time.time() + RATE_WINDOW, 0
+            allowed = self.used < RATE_LIMIT
+            if allowed and counts:
+                self.used += 1
+            return allowed, {
+                "X-RateLimit-Limit": str(RATE_LIMIT),
+                "X-RateLimit-Remaining": str(RATE_LIMIT - self.used),
+                "X-RateLimit-Used": str(self.used),
+                "X-RateLimit-Reset": str(int(self.reset_at) + 1),
+            }
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rate_limit = RateLimit()
+
+    def setup(self):
+        time.sleep(HANDSHAKE)
+        # Headers and body are two writes, without this the body waits for a delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def do_GET(self):
+        issue_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        etag = f'"issue-{issue_id}-v1"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        allowed, headers = self.rate_limit.take(counts=not not_modified)
+        if not allowed:
+            self.respond(403, {"message": "API rate limit exceeded"}, headers)
+        elif not_modified:
+            self.respond(304, None, {**headers, "ETag": etag})
+        else:
+            issue = {"number": int(issue_id), "title": f"Issue {issue_id}", "body": "x" * 2000, "state": "open"}
+            self.respond(200, issue, {**headers, "ETag": etag})
+
+    def respond(self, status: int, body, headers: dict[str, str]):
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def urllib_get_issue(base_url: str, issue_id: int) -> dict:
+    req = urllib.request.Request(f"{base_url}/repos/owner/repo/issues/{issue_id}")
+    req.add_header("Accept", "application/vnd.github.v3+json")
+    req.add_header("User-Agent", "GitHub-Issue-Fetcher")
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read().decode())
+
+
+def report(name: str, latencies: list[float], failures: int, extra: str = ""):
+    print(f"{name:<13} p50 {1000 * statistics.median(latencies):6.2f} ms  "
+          f"p95 {1000 * statistics.quantiles(latencies, n=20)[-1]:7.2f} ms  "
+          f"total {sum(latencies):5.2f}s  failed {failures:>3}{extra}")
+
+
+def run_urllib(base_url: str, name: str, issue_ids: list[int]):
+    latencies, failures = [], 0
+    for issue_id in issue_ids:
+        start = time.perf_counter()
+        try:
+            urllib_get_issue(base_url, issue_id)
+        except urllib.error.HTTPError:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    report(name, latencies, failures)
+
+
+async def run_client(base_url: str, cache_path: str, name: str, issue_ids: list[int]):
+    github = GitHubClient(base_url=base_url, token="", cache_path=cache_path)
+    latencies = []
+    for issue_id in issue_ids:
+        start = time.perf_counter()
+        await github.get(f"repos/owner/repo/issues/{issue_id}")
+        latencies.append(time.perf_counter() - start)
+    await github.aclose()
+    stats = github.cache.stats()
+    report(name, latencies, 0,
+           f"  304 hits {stats['hits']}/{len(issue_ids)}  rate limit waits {github.rate_limit_waits}")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{1000 * HANDSHAKE:.0f} ms per new connection, "
+          f"limit {RATE_LIMIT} requests per {RATE_WINDOW:.0f}s")
+    rounds = {"repeated": [i % ISSUES for i in range(CALLS)], "cold": list(range(1000, 1000 + COLD))}
+    try:
+        for round_name, issue_ids in rounds.items():
+            print(f"{round_name}: {len(issue_ids)} calls, {len(set(issue_ids))} issues")
+            for run in ("urllib", "GitHubClient"):
+                time.sleep(RATE_WINDOW)  # start each run with the whole limit
+                if run == "urllib":
+                    run_urllib(base_url, run, issue_ids)
+                else:
+                    with tempfile.TemporaryDirectory() as tmp:
+                        asyncio.run(run_client(base_url, os.path.join(tmp, "github_cache.db"), run, issue_ids))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
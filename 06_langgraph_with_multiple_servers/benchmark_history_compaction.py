@@ -0,0 +1,80 @@
+"""
+Prompt size of the chatbot over a long session, with and without history_compaction.py.
+
+Every simulated turn is a question, a tool call to execute_sql_query, its ~6KB result
+(200 rows in the columnar format of the database server) and the answer, so the chatbot is
+called twice per turn. "full history" sends every message as the graph did before,
+"compacted" runs the compaction node before each call (without a summarizer, the removed
+turns become a list of the earlier requests). Tokens are estimated as the compactor does.
+"uv run benchmark_history_compaction.py"
+"""
+import asyncio
+import json
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from history_compaction import HistoryCompactor
+
+TURNS = 50
+ROWS = 200
+
+
+def sql_result(turn: int) -> str:
+    return json.dumps({
+        "columns": ["order_id", "store", "product", "amount"],
+        "data": [
+            list(range(turn * ROWS, (turn + 1) * ROWS)),
+            [f"store_{i % 12}" for i in range(ROWS)],
+            [f"product_{i % 40}" for i in range(ROWS)],
+            [round(i * 1.37, 2) for i in range(ROWS)],
+        ],
+        "row_count": ROWS,
+        "next_cursor": None,
+    })
+
+
+def check_pairs(messages) -> None:
+    """Every tool result follows its tool call and every tool call has its result"""
+    calls = set()
+    for message in messages:
+        if isinstance(message, AIMessage):
+            calls |= {call["id"] for call in message.tool_calls}
+        if isinstance(message, ToolMessage):
+            assert message.tool_call_id in calls, f"orphan tool result {message.tool_call_id}"
+    assert calls <= {message.tool_call_id for message in messages if isinstance(message, ToolMessage)}, "tool call without result"
+
+
+async def session(compactor: HistoryCompactor | None) -> tuple[list[int], float]:
+    messages: list = []
+    prompt_tokens = []
+    compaction_time = 0.0
+
+    async def call_chatbot(response: AIMessage):
+        nonlocal messages, compaction_time
+        if compactor:
+            start = time.perf_counter()
+            update = await compactor.node({"messages": messages})
+            compaction_time += time.perf_counter() - start
+            if update:
+                messages = add_messages(messages, update["messages"])
+        check_pairs(messages)
+        prompt_tokens.append(HistoryCompactor.count(messages))
+        messages = add_messages(messages, [response])
+
+    for turn in range(TURNS):
+        messages = add_messages(messages, [HumanMessage(f"Which store sold most in week {turn}?")])
+        tool_call = {"name": "execute_sql_query", "args": {"query": f"SELECT * FROM sell_info WHERE week = {turn}"}, "id": f"call_{turn}"}
+        await call_chatbot(AIMessage("", tool_calls=[tool_call]))
+        messages = add_messages(messages, [ToolMessage(sql_result(turn), name="execute_sql_query", tool_call_id=f"call_{turn}")])
+        await call_chatbot(AIMessage(f"Store {turn % 12} sold the most in week {turn}."))
+    return prompt_tokens, compaction_time
+
+
+if __name__ == "__main__":
+    print(f"{TURNS} turns, {2 * TURNS} chatbot calls")
+    print(f"{'history':<16}{'last prompt':>13}{'max prompt':>12}{'total tokens':>14}{'compaction ms':>15}")
+    for name, compactor in [("full history", None), ("compacted", HistoryCompactor(max_tokens=8000))]:
+        prompt_tokens, compaction_time = asyncio.run(session(compactor))
+        print(f"{name:<16}{prompt_tokens[-1]:>13}{max(prompt_tokens):>12}{sum(prompt_tokens):>14}{1000 * compaction_time:>15.1f}")
@@ -0,0 +1,81 @@
+"""
+Size of the make_changes call the model has to write for a few small edits of a big file.
+
+The file is a synthetic Python module of FUNCTIONS functions. EDITS functions are changed,
+one line each, and the same change is sent three ways: the whole new content (the
+previous make_changes), search/replace blocks and a unified diff with 3 lines of context.
+The tokens are estimated at 4 characters per token, the output tokens are what takes the
+model seconds to generate. The diff is applied again after lines were added at the top
+of the file, as when the file changed since the model read it.
+"uv run benchmark_make_changes.py"
+"""
+import difflib
+import json
+import os
+import random
+import tempfile
+import time
+
+from file_patch import apply_changes
+
+FUNCTIONS = 1000
+EDITS = 5
+
+
+def module(functions: int) -> str:
+    return "".join(
+        f"def compute_{i}(values):\n"
+        f"    total = 0\n"
+        f"    for value in values:\n"
+        f"        total += value * {i}\n"
+        f"    return total\n\n\n"
+        for i in range(functions)
+    )
+
+
+def report(name: str, arguments: dict, seconds: float, result: dict):
+    size = len(json.dumps(arguments))
+    print(f"{name:<15} {size:>9,} chars  ~{size // 4:>7,} tokens  applied in {1000 * seconds:6.2f} ms  {result['status']}")
+
+
+def main():
+    random.seed(0)
+    original = module(FUNCTIONS)
+    edited_functions = sorted(random.sample(range(FUNCTIONS), EDITS))
+    edited = original
+    for i in edited_functions:
+        edited = edited.replace(f"        total += value * {i}\n", f"        total += value * {i} + 1\n")
+    print(f"{len(original.splitlines()):,} lines, {EDITS} one-line edits")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "module.py")
+        changes = {
+            "whole file": {"file_path": path, "content": edited},
+            "search/replace": {"file_path": path, "search_replace": [
+                {"search": f"        total += value * {i}\n", "replace": f"        total += value * {i} + 1\n"}
+                for i in edited_functions
+            ]},
+            "unified diff": {"file_path": path, "diff": "".join(
+                difflib.unified_diff(original.splitlines(True), edited.splitlines(True), "a/module.py", "b/module.py", n=3)
+            )},
+        }
+        for name, edit in changes.items():
+            with open(path, "w") as file:
+                file.write(original)
+            start = time.perf_counter()
+            result = apply_changes([edit])  # type: ignore[list-item]
+            seconds = time.perf_counter() - start
+            with open(path) as file:
+                assert file.read() == edited, name
+            report(name, {"edits": [edit]}, seconds, result)
+
+        with open(path, "w") as file:
+            file.write("import math\nimport os\n\n" + original)
+        result = apply_changes([changes["unified diff"]])  # type: ignore[list-item]
+        with open(path) as file:
+            applied = file.read() == "import math\nimport os\n\n" + edited
+        print(f"diff on the file moved 3 lines: {result['status']}, correct: {applied}")
+
+
+if __name__ == "__main__":
+    main()
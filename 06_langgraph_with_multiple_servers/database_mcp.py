@@ -2,14 +2,20 @@
 from mcp.server.fastmcp import FastMCP
 import dotenv
 import json 
-import sqlite3
-import pandas as pd
+import os
 import logging 
 from langchain_community.llms import OpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from matplotlib import pyplot as plt
 from typing import Any
+from translation_cache import TranslationCache
+from schema_cache import get_schema_cache
+from result_cache import get_result_cache
+from query_stream import QueryCursorStore
+from query_guard import QueryGuardError
+from loop_lag_monitor import lag_monitor
+from tool_memo import cached_tool
 
 
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +23,16 @@ logging.info("Starting setup")
 
 dotenv.load_dotenv()
 
-mcp = FastMCP("database")
+# LOOP_LAG_MONITOR=1 reports the tools that block the server event loop
+mcp = FastMCP("database", port=int(os.environ.get("MCP_PORT", "8000")), lifespan=lag_monitor.lifespan)
 
-@mcp.tool()
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Repeated questions are answered from here instead of calling the LLM again
+translation_cache = TranslationCache(os.path.join(SCRIPT_DIR, "translation_cache.db"))
+
+# Always the same answer, cached here and in the agent
+@cached_tool(mcp)
 def extract_data_from_database() -> str:
     """
     Get the instructions on how to extract data from a database.
@@ -30,56 +43,100 @@ def extract_data_from_database() -> str:
     return json.dumps({"steps": [
         "First of all always execute the tool get_database_schema, "
         "Once you have the schema use the tool transform_natural_languaje_to_sql",
-        "Once you have the corresponding sql use the tool execute_sql_query"]})
+        "Once you have the corresponding sql use the tool execute_sql_query",
+        "If the result has a next_cursor and you need more rows, use the tool fetch_more"]})
+
+# Rows returned per call, the agent asks for the rest with fetch_more
+DEFAULT_MAX_ROWS = 200
+MAX_ROWS_LIMIT = 1000
+
+query_cursors = QueryCursorStore()
 
 @mcp.tool()
-def execute_sql_query(sql_query, db_path="data.db"):
+def execute_sql_query(sql_query: str, db_path: str = "data.db", max_rows: int = DEFAULT_MAX_ROWS) -> dict[str, Any]:
+    """
+    Execute a read-only SQL query and return the first page of the result.
+
+    Args:
+        sql_query: the SQL query to execute
+        db_path: path of the SQLite database
+        max_rows: maximum number of rows to return (up to 1000)
+
+    Returns:
+        {"columns": [...], "data": [values of each column], "row_count": n, "next_cursor": str | None}
+        If next_cursor is not null there are more rows, use the tool fetch_more to get them.
+        Joins without a join condition over big tables are rejected and slow queries are
+        stopped, then {"error", "error_type", "hint", ...} is returned: rewrite the query following the hint.
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        df = pd.read_sql_query(sql_query, conn)
-        logging.info(f"SQL Query executed successfully: {df}")
-        conn.close()
-        return df, None
+        page = query_cursors.execute(sql_query, db_path, min(max(max_rows, 1), MAX_ROWS_LIMIT))
+        logging.info(f"SQL Query executed successfully: {page['row_count']} rows, next_cursor={page['next_cursor']}")
+        logging.info(f"Result cache: {get_result_cache(db_path).stats()}")
+        return page
+    except QueryGuardError as e:
+        # Structured, so the agent can rewrite the query
+        logging.warning(f"SQL Query stopped by the guard: {e.to_dict()}")
+        translation_cache.discard(sql_query)
+        return e.to_dict()
     except Exception as e:
         logging.error(f"Error executing SQL Query: {e}")
-        return None, str(e)
+        # A bad translation is not served again by transform_natural_languaje_to_sql
+        translation_cache.discard(sql_query)
+        return {"error": str(e)}
 
 @mcp.tool()
-def get_database_schema():
+def fetch_more(cursor: str, max_rows: int = DEFAULT_MAX_ROWS) -> dict[str, Any]:
+    """
+    Get the next page of a query result started with execute_sql_query.
+
+    Args:
+        cursor: the next_cursor returned by execute_sql_query or by a previous fetch_more
+        max_rows: maximum number of rows to return (up to 1000)
+    """
+    try:
+        return query_cursors.fetch_more(cursor, min(max(max_rows, 1), MAX_ROWS_LIMIT))
+    except QueryGuardError as e:
+        logging.warning(f"SQL Query stopped by the guard: {e.to_dict()}")
+        return e.to_dict()
+    except Exception as e:
+        logging.error(f"Error fetching more rows: {e}")
+        return {"error": str(e)}
+
+# The agent asks for it on every question, a minute old schema is fine
+@cached_tool(mcp, ttl=60)
+def get_database_schema(db_path: str = "data.db") -> str:
     """
-    Get the database schema information.
+    Get the database schema information: columns, indexes and an estimate of the rows of each table.
     """
-    return json.dumps({
-        "user_info": {
-            "columns": ["user_id INTEGER", "age INTEGER", "gender TEXT", "name TEXT", "lastname TEXT"]
-        },
-        "sell_info": {
-            "columns": ["user_id INTEGER", "item_id INTEGER", "date INTEGER", "value INTEGER"]
-        },
-        "items_info": {
-            "columns": ["item_id INTEGER", "item_name TEXT", "category TEXT"]
-        }
-    })
+    # Read from the database, only refreshed when its schema changes
+    return json.dumps(get_schema_cache(db_path).get())
 
-@mcp.tool()
-def transform_natural_languaje_to_sql(user_question: str) -> str:
-    llm = OpenAI(temperature=0)
-    
-    prompt_template = """
+TRANSLATION_PROMPT_TEMPLATE = """
     Given the following user question about data, convert it to a valid SQL query.
     If you do joins, always explicite the table names before the column.
-    Before generating the SQL, first get the database schema using the tool 'get_database_schema'.
 
+    Database schemas
+{schema}
     User question: {question}
     
     SQL Query (return only the SQL, no explanation):
     """
 
-    
-    prompt = PromptTemplate(template=prompt_template, input_variables=["question"])
+def translate_to_sql(user_question: str, schema: str) -> str:
+    llm = OpenAI(temperature=0)
+    prompt = PromptTemplate(template=TRANSLATION_PROMPT_TEMPLATE, input_variables=["question", "schema"])
     llm_chain = LLMChain(llm=llm, prompt=prompt)
-    sql_query = llm_chain.run(question=prompt)
+    return llm_chain.run(question=user_question, schema=schema)
+
+@mcp.tool()
+def transform_natural_languaje_to_sql(user_question: str, db_path="data.db") -> str:
+    schema_cache = get_schema_cache(db_path)
+    schema = schema_cache.text()
+    fingerprint = schema_cache.fingerprint(TRANSLATION_PROMPT_TEMPLATE)
+    sql_query = translation_cache.get_or_translate(user_question, fingerprint, lambda question: translate_to_sql(question, schema))
+    logging.info(f"Translation cache: {translation_cache.stats()}")
 
     return sql_query
 
-mcp.run(transport="streamable-http")
\ No newline at end of file
+# MCP_TRANSPORT=stdio when the agent starts the server itself, see mcp_launcher.py
+mcp.run(transport=os.environ.get("MCP_TRANSPORT", "streamable-http"))
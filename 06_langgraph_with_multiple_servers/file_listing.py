@@ -0,0 +1,190 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+# Never listed, whatever the .gitignore files say
+ALWAYS_SKIPPED = {".git", ".hg", ".svn"}
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Regex of a gitignore-style glob: * and ? stop at /, ** crosses directories"""
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[" and (end := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1:end]
+            out.append("[" + ("^" + body[1:] if body[0] in "!^" else body).replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+    # Matched against the path relative to the .gitignore directory, else against the name
+    anchored: bool
+
+
+def parse_gitignore(text: str) -> list[IgnoreRule]:
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        rules.append(IgnoreRule(re.compile(glob_to_regex(line) + r"\Z"), negated, dir_only, anchored))
+    return rules
+
+
+@dataclass(frozen=True)
+class IgnoreFile:
+    # Directory of the .gitignore, relative to the listed root, "" for the root
+    base: str
+    rules: list[IgnoreRule]
+
+
+def is_ignored(rel_path: str, name: str, is_dir: bool, ignore_files: list[IgnoreFile]) -> bool:
+    """git semantics: the last matching rule wins, the deeper .gitignore files come last"""
+    ignored = False
+    for ignore_file in ignore_files:
+        path = rel_path[len(ignore_file.base) + 1:] if ignore_file.base else rel_path
+        for rule in ignore_file.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(path if rule.anchored else name):
+                ignored = not rule.negated
+    return ignored
+
+
+def cursor_parts(cursor: str | None) -> tuple[str, ...]:
+    return tuple(cursor.split("/")) if cursor else ()
+
+
+def iter_files(
+    root: str,
+    pattern: str | None = None,
+    max_depth: int | None = None,
+    cursor: str | None = None,
+    respect_gitignore: bool = True,
+) -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    (relative path, DirEntry) of the files under root, depth first with the entries of
+    each directory sorted by name, so the order is stable and a listing can continue after
+    the cursor (the last path returned). The subtrees before the cursor are skipped without
+    being read.
+
+    pattern is a glob on the relative path ("src/**/*.py"), or on the name when it has no /
+    ("*.py"). max_depth 0 lists only the files of root. Ignored directories are not entered,
+    nor the ones outside the literal start of pattern ("src/" of "src/**/*.py").
+    """
+    regex = re.compile(glob_to_regex(pattern) + r"\Z") if pattern else None
+    match_name = pattern is not None and "/" not in pattern
+    prefix: tuple[str, ...] = ()
+    if pattern and not match_name:
+        for part in pattern.split("/")[:-1]:
+            if any(c in part for c in "*?["):
+                break
+            prefix += (part,)
+    after = cursor_parts(cursor)
+
+    def walk(directory: str, rel_dir: str, depth: int, ignore_files: list[IgnoreFile]) -> Iterator[tuple[str, os.DirEntry]]:
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+        if respect_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            try:
+                with open(os.path.join(directory, ".gitignore"), encoding="utf-8", errors="replace") as file:
+                    ignore_files = [*ignore_files, IgnoreFile(rel_dir, parse_gitignore(file.read()))]
+            except OSError:
+                pass
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if after:
+                parts = tuple(rel_path.split("/"))
+                # A directory that contains the cursor is entered, everything before it is skipped
+                if not (is_dir and parts == after[:len(parts)]) and parts <= after:
+                    continue
+            if is_dir and entry.name in ALWAYS_SKIPPED:
+                continue
+            if ignore_files and is_ignored(rel_path, entry.name, is_dir, ignore_files):
+                continue
+            if is_dir:
+                parts = tuple(rel_path.split("/"))
+                if parts[:len(prefix)] != prefix[:len(parts)]:
+                    continue
+                if max_depth is None or depth < max_depth:
+                    yield from walk(entry.path, rel_path, depth + 1, ignore_files)
+            elif regex is None or regex.match(entry.name if match_name else rel_path):
+                yield rel_path, entry
+
+    yield from walk(root, "", 0, [])
+
+
+def list_files_page(
+    root: str,
+    pattern: str | None = None,
+    max_depth: int | None = None,
+    cursor: str | None = None,
+    limit: int = 1000,
+    respect_gitignore: bool = True,
+) -> dict[str, Any]:
+    """
+    One page of files: {"root", "columns": ["path", "size", "mtime"], "data": [values of
+    each column], "row_count", "next_cursor"}. Paths are relative to root, mtime in unix
+    seconds. next_cursor is None on the last page.
+    """
+    paths, sizes, mtimes = [], [], []
+    next_cursor = None
+    for rel_path, entry in iter_files(root, pattern, max_depth, cursor, respect_gitignore):
+        if len(paths) == limit:
+            next_cursor = paths[-1]
+            break
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        paths.append(rel_path)
+        sizes.append(stat.st_size)
+        mtimes.append(int(stat.st_mtime))
+    return {
+        "root": os.path.abspath(root),
+        "columns": ["path", "size", "mtime"],
+        "data": [paths, sizes, mtimes],
+        "row_count": len(paths),
+        "next_cursor": next_cursor,
+    }
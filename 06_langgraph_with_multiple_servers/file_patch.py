@@ -0,0 +1,316 @@
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+# pydantic (the MCP tool schema) only accepts typing.TypedDict from Python 3.12
+from typing_extensions import TypedDict
+
+# Lines of context that can be dropped from each end of a hunk that does not match, as patch --fuzz=2
+MAX_FUZZ = 2
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+# git diff lines between two files, they end the hunk before them
+FILE_HEADERS = ("diff ", "index ", "new file mode", "deleted file mode", "old mode", "new mode",
+                "similarity index", "dissimilarity index", "rename ", "copy ", "Binary files")
+
+# Line comparisons tried in order: exact, trailing whitespace ignored, indentation ignored
+NORMALIZERS: list[Callable[[str], str]] = [lambda line: line, str.rstrip, str.strip]
+
+
+class PatchError(Exception):
+    """A change that cannot be applied, nothing is written"""
+
+
+class SearchReplace(TypedDict):
+    search: str
+    replace: str
+
+
+class FileEdit(TypedDict, total=False):
+    file_path: str
+    # Unified diff of this file, only its @@ hunks are needed
+    diff: str
+    search_replace: list[SearchReplace]
+    # Whole new content, for new files
+    content: str
+
+
+@dataclass
+class Hunk:
+    # 0-based line where the hunk starts in the original file, None if the header has no numbers
+    old_start: int | None
+    # (" " | "-" | "+", text without the line ending)
+    lines: list[tuple[str, str]] = field(default_factory=list)
+
+    def old_lines(self) -> list[str]:
+        return [text for tag, text in self.lines if tag != "+"]
+
+    def new_lines(self) -> list[str]:
+        return [text for tag, text in self.lines if tag != "-"]
+
+
+@dataclass
+class FilePatch:
+    old_path: str | None
+    new_path: str | None
+    hunks: list[Hunk] = field(default_factory=list)
+
+
+@dataclass
+class PatchResult:
+    file_path: str
+    # New content, None when the file is deleted
+    content: str | None
+    hunks: int = 0
+    # Hunks that only matched ignoring whitespace, or with less context
+    fuzzy: int = 0
+
+
+def strip_diff_path(path: str) -> str | None:
+    path = path.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def parse_unified_diff(diff: str) -> list[FilePatch]:
+    """
+    The files of a unified diff (git diff or diff -u). The line counts of the @@ headers are
+    not trusted, a hunk goes until the next header; a diff of a single file can be only @@ hunks.
+    A line of a hunk without a " ", "-" or "+" prefix, or a hunk that changes nothing, is a
+    PatchError: the change it was part of would be lost.
+    """
+    patches: list[FilePatch] = []
+    hunk: Hunk | None = None
+    lines = diff.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            patches.append(FilePatch(strip_diff_path(line[4:]), strip_diff_path(lines[i + 1][4:])))
+            hunk = None
+            i += 2
+            continue
+        if line.startswith("@@"):
+            if not patches:
+                patches.append(FilePatch(None, None))
+            match = HUNK_HEADER.match(line)
+            hunk = Hunk(max(int(match.group(1)) - 1, 0) if match else None)
+            patches[-1].hunks.append(hunk)
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk.lines.append((line[0], line[1:]))
+        elif hunk is not None and line == "":
+            # Editors and models drop the space of empty context lines
+            hunk.lines.append((" ", ""))
+        elif line.startswith(FILE_HEADERS) or hunk is None:
+            # diff --git, index, new file mode... between files
+            hunk = None
+        elif not line.startswith("\\"):
+            raise PatchError(f"line {i + 1} of the diff has no \" \", \"-\" or \"+\" prefix: {line!r}")
+        i += 1
+    for patch in patches:
+        for number, hunk in enumerate(patch.hunks, 1):
+            while hunk.lines and hunk.lines[-1] == (" ", ""):
+                hunk.lines.pop()
+            if not any(tag != " " for tag, _ in hunk.lines):
+                raise PatchError(f"{patch.new_path or patch.old_path or 'the diff'}: hunk {number} has no \"-\" or \"+\" lines")
+    return patches
+
+
+def find_block(lines: list[str], block: list[str], start: int, hint: int | None) -> tuple[int, int] | None:
+    """(position, normalizer level) of block in lines[start:], the closest to hint for each level"""
+    if not block:
+        return (max(start, hint or 0), 0) if (hint or 0) <= len(lines) else None
+    for level, normalize in enumerate(NORMALIZERS):
+        wanted = [normalize(line) for line in block]
+        first = wanted[0]
+        positions = [
+            i for i in range(start, len(lines) - len(block) + 1)
+            if normalize(lines[i]) == first and all(normalize(lines[i + j]) == wanted[j] for j in range(1, len(block)))
+        ]
+        if positions:
+            return min(positions, key=lambda i: abs(i - (hint if hint is not None else start))), level
+    return None
+
+
+def apply_hunks(text: str, hunks: list[Hunk], file_path: str) -> tuple[str, int]:
+    """The text with the hunks applied, in order, and how many of them needed fuzz"""
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.replace("\r\n", "\n").split("\n")
+    offset, start, fuzzy = 0, 0, 0
+    for number, hunk in enumerate(hunks, 1):
+        found = None
+        for fuzz in range(MAX_FUZZ + 1):
+            # Less context on each try, the removed and added lines are always kept
+            head = min(fuzz, next((i for i, (tag, _) in enumerate(hunk.lines) if tag != " "), 0))
+            tail = min(fuzz, next((i for i, (tag, _) in enumerate(reversed(hunk.lines)) if tag != " "), 0))
+            trimmed = Hunk(hunk.old_start, hunk.lines[head:len(hunk.lines) - tail])
+            hint = None if hunk.old_start is None else hunk.old_start + offset + head
+            found = find_block(lines, trimmed.old_lines(), start, hint)
+            if found is not None:
+                break
+        if found is None:
+            preview = "\n".join(hunk.old_lines()[:5])
+            raise PatchError(f"{file_path}: hunk {number} does not match the file, its lines are:\n{preview}")
+        position, level = found
+        if level or fuzz:
+            fuzzy += 1
+        old = trimmed.old_lines()
+        # The context lines keep the text of the file, only "-" and "+" lines come from the hunk
+        new, k = [], position
+        for tag, text in trimmed.lines:
+            if tag == " ":
+                new.append(lines[k])
+            if tag == "+":
+                new.append(text)
+            else:
+                k += 1
+        lines[position:position + len(old)] = new
+        if hunk.old_start is not None:
+            offset = position - hunk.old_start - head + len(new) - len(old)
+        start = position + len(new)
+    return newline.join(lines), fuzzy
+
+
+def apply_search_replace(text: str, edits: list[SearchReplace], file_path: str) -> tuple[str, int]:
+    """
+    Each search must be found once in the text. When it is not there as is, it is looked
+    for line by line ignoring the whitespace at the ends of the lines.
+    """
+    fuzzy = 0
+    for number, edit in enumerate(edits, 1):
+        search, replace = edit["search"], edit["replace"]
+        count = text.count(search) if search else 0
+        if count == 1:
+            text = text.replace(search, replace)
+            continue
+        if count > 1:
+            raise PatchError(f"{file_path}: search {number} is found {count} times, add lines around it so it is unique")
+        newline = "\r\n" if "\r\n" in text else "\n"
+        lines = text.replace("\r\n", "\n").split("\n")
+        block = search.strip("\n").split("\n")
+        wanted = [line.strip() for line in block]
+        positions = [
+            i for i in range(len(lines) - len(block) + 1)
+            if all(lines[i + j].strip() == wanted[j] for j in range(len(block)))
+        ] if search.strip() else []
+        if len(positions) != 1:
+            problem = "is not in the file" if not positions else f"is found {len(positions)} times ignoring whitespace"
+            raise PatchError(f"{file_path}: search {number} {problem}")
+        lines[positions[0]:positions[0] + len(block)] = replace.strip("\n").split("\n") if replace.strip("\n") else []
+        text = newline.join(lines)
+        fuzzy += 1
+    return text, fuzzy
+
+
+def read_text(file_path: str, pending: dict[str, str | None]) -> str:
+    """The file, as left by the previous changes of the same call if any"""
+    file_path = os.path.abspath(file_path)
+    if file_path in pending:
+        if pending[file_path] is None:
+            raise PatchError(f"{file_path} is deleted by a previous change")
+        return pending[file_path]  # type: ignore[return-value]
+    try:
+        with open(file_path, encoding="utf-8", newline="") as file:
+            return file.read()
+    except FileNotFoundError:
+        raise PatchError(f"{file_path} does not exist") from None
+    except UnicodeDecodeError:
+        raise PatchError(f"{file_path} is not a UTF-8 text file") from None
+
+
+def atomic_write(file_path: str, content: str):
+    """Written to a temporary file of the same directory then renamed, a crash leaves the old file or the new one"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def prepare_edit(edit: FileEdit, pending: dict[str, str | None]) -> PatchResult:
+    file_path = edit["file_path"]
+    if "content" in edit:
+        return PatchResult(file_path, edit["content"])
+    text = read_text(file_path, pending)
+    result = PatchResult(file_path, text)
+    if edit.get("diff"):
+        hunks = [hunk for patch in parse_unified_diff(edit["diff"]) for hunk in patch.hunks]
+        if not hunks:
+            raise PatchError(f"{file_path}: the diff has no @@ hunks")
+        result.content, fuzzy = apply_hunks(result.content, hunks, file_path)  # type: ignore[arg-type]
+        result.hunks += len(hunks)
+        result.fuzzy += fuzzy
+    if edit.get("search_replace"):
+        result.content, fuzzy = apply_search_replace(result.content, edit["search_replace"], file_path)  # type: ignore[arg-type]
+        result.hunks += len(edit["search_replace"])
+        result.fuzzy += fuzzy
+    return result
+
+
+def prepare_patch(patch: str, repo_path: str, pending: dict[str, str | None]) -> list[PatchResult]:
+    results = []
+    for file_patch in parse_unified_diff(patch):
+        path = file_patch.new_path or file_patch.old_path
+        if path is None:
+            raise PatchError("the patch has hunks without --- / +++ file headers")
+        file_path = os.path.join(repo_path, path)
+        if file_patch.new_path is None:
+            result = PatchResult(file_path, None, len(file_patch.hunks))
+        else:
+            text = "" if file_patch.old_path is None else read_text(os.path.join(repo_path, file_patch.old_path), pending)
+            content, fuzzy = apply_hunks(text, file_patch.hunks, file_path)
+            result = PatchResult(file_path, content, len(file_patch.hunks), fuzzy)
+        pending[os.path.abspath(file_path)] = result.content
+        results.append(result)
+    return results
+
+
+def apply_changes(edits: list[FileEdit] | None = None, patch: str | None = None, repo_path: str | None = None) -> dict[str, Any]:
+    """
+    Applies the edits and the patch to several files, all or nothing: every change is
+    checked before any file is written, then each file is replaced atomically. Several
+    changes of the same file apply one after the other.
+    """
+    # Absolute path -> content after the changes seen so far, None if deleted
+    pending: dict[str, str | None] = {}
+    results: list[PatchResult] = []
+    try:
+        for edit in edits or []:
+            result = prepare_edit(edit, pending)
+            pending[os.path.abspath(result.file_path)] = result.content
+            results.append(result)
+        if patch:
+            if repo_path is None:
+                raise PatchError("repo_path is needed to apply a patch, its paths are relative to it")
+            results += prepare_patch(patch, repo_path, pending)
+    except PatchError as e:
+        return {"status": "error", "error": str(e), "hint": "no file was changed, read the file again and retry"}
+    if not results:
+        return {"status": "error", "error": "no changes given"}
+
+    for file_path, content in pending.items():
+        if content is None:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        else:
+            atomic_write(file_path, content)
+    return {
+        "status": "success",
+        "files": [
+            {"file_path": result.file_path, "deleted": result.content is None, "hunks": result.hunks, "fuzzy_hunks": result.fuzzy}
+            for result in results
+        ],
+    }
@@ -0,0 +1,176 @@
+import base64
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Hard cap of the content returned by one read, bigger ranges are cut and continue on the next call
+MAX_READ_BYTES = 256 * 1024
+# Bytes looked at to decide whether a file is binary
+BINARY_SNIFF_BYTES = 8192
+# Bytes of the file scanned at a time when building a line index
+INDEX_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def is_binary(sample: bytes) -> bool:
+    """A NUL byte, or bytes that are not UTF-8, as git does"""
+    if b"\0" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still text
+        return e.start < len(sample) - 3
+    return False
+
+
+def build_line_index(mm: mmap.mmap, size: int) -> np.ndarray:
+    """Offset where each line starts, a new line after every \\n except a final one"""
+    starts = [np.zeros(1, dtype=np.int64)]
+    for position in range(0, size, INDEX_CHUNK_BYTES):
+        chunk = np.frombuffer(mm, dtype=np.uint8, count=min(INDEX_CHUNK_BYTES, size - position), offset=position)
+        starts.append(np.flatnonzero(chunk == ord("\n")).astype(np.int64) + position + 1)
+        # The view holds the mmap buffer, it could not be closed while it exists
+        del chunk
+    index = np.concatenate(starts)
+    return index[:-1] if size and index[-1] == size else index
+
+
+@dataclass
+class FileIndex:
+    # (st_size, st_mtime_ns, st_ino) the index was built for, a change rebuilds it
+    version: tuple[int, int, int]
+    binary: bool
+    line_starts: np.ndarray | None = None
+
+
+class FileReader:
+    """
+    Line ranges and byte ranges of files read through mmap, so only the pages of the range
+    are loaded, whatever the size of the file.
+
+    The offset of every line is indexed the first time a line range of the file is read and
+    kept (LRU of max_files files, 8 bytes per line) until the file changes, then any line
+    range costs two lookups in the index and one slice of the mapping.
+    """
+
+    def __init__(self, max_files: int = 32, max_read_bytes: int = MAX_READ_BYTES):
+        self.max_files = max_files
+        self.max_read_bytes = max_read_bytes
+        self.index_builds = 0
+        self._indexes: OrderedDict[str, FileIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read_lines(self, path: str, start_line: int = 1, end_line: int | None = None) -> dict[str, Any]:
+        """
+        Lines start_line to end_line (1-based, both included, end_line None up to the end).
+        Past max_read_bytes the content stops at the last whole line, truncated is True and
+        next_start_line is where to continue. A single line longer than that is cut, and
+        next_offset is where its rest starts, for read_bytes().
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return self._lines_result("", 0, 0, 0, size, False)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = self._index(path, file, mm, size, lines=True)
+                if index.binary:
+                    return self._binary_result(size)
+                line_starts = index.line_starts
+                total_lines = len(line_starts)  # type: ignore[arg-type]
+                start_line = max(start_line, 1)
+                end_line = total_lines if end_line is None else min(end_line, total_lines)
+                if start_line > end_line:
+                    return self._lines_result("", start_line, start_line - 1, total_lines, size, False)
+
+                start = int(line_starts[start_line - 1])  # type: ignore[index]
+                end = int(line_starts[end_line]) if end_line < total_lines else size  # type: ignore[index]
+                truncated = end - start > self.max_read_bytes
+                next_offset = None
+                if truncated:
+                    # Last line that ends within the cap, at least one line even if it is longer
+                    limit = start + self.max_read_bytes
+                    last_line = int(np.searchsorted(line_starts, limit, side="right")) - 1  # type: ignore[arg-type]
+                    if last_line >= start_line:
+                        end_line, end = last_line, int(line_starts[last_line])  # type: ignore[index]
+                    else:
+                        end_line, end = start_line, limit
+                        next_offset = limit
+                content = mm[start:end].decode("utf-8", errors="replace")
+        result = self._lines_result(content, start_line, end_line, total_lines, size, truncated)
+        if next_offset is not None:
+            result["next_offset"] = next_offset
+        return result
+
+    def read_bytes(self, path: str, offset: int = 0, length: int | None = None) -> dict[str, Any]:
+        """
+        length bytes from offset, at most max_read_bytes (next_offset then says where to
+        continue). Text is decoded as UTF-8, binary files are returned in base64.
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            offset = min(max(offset, 0), size)
+            end = size if length is None else min(offset + max(length, 0), size)
+            truncated = end - offset > self.max_read_bytes
+            end = min(end, offset + self.max_read_bytes)
+            if size == 0:
+                data, binary = b"", False
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    binary = self._index(path, file, mm, size, lines=False).binary
+                    data = mm[offset:end]
+        return {
+            "content": base64.b64encode(data).decode() if binary else data.decode("utf-8", errors="replace"),
+            "encoding": "base64" if binary else "utf-8",
+            "offset": offset,
+            "length": len(data),
+            "size": size,
+            "truncated": truncated,
+            "next_offset": end if truncated else None,
+        }
+
+    def _index(self, path: str, file, mm: mmap.mmap, size: int, lines: bool) -> FileIndex:
+        stat = os.fstat(file.fileno())
+        version = (size, stat.st_mtime_ns, stat.st_ino)
+        key = os.path.realpath(path)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(key)
+                if index.binary or index.line_starts is not None or not lines:
+                    return index
+        if index is None or index.version != version:
+            index = FileIndex(version, is_binary(mm[:BINARY_SNIFF_BYTES]))
+        if lines and not index.binary:
+            index = FileIndex(version, False, build_line_index(mm, size))
+            self.index_builds += 1
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_files:
+                self._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _lines_result(content: str, start_line: int, end_line: int, total_lines: int, size: int, truncated: bool) -> dict[str, Any]:
+        return {
+            "content": content,
+            "start_line": start_line,
+            "end_line": end_line,
+            "total_lines": total_lines,
+            "size": size,
+            "truncated": truncated,
+            "next_start_line": end_line + 1 if truncated else None,
+        }
+
+    @staticmethod
+    def _binary_result(size: int) -> dict[str, Any]:
+        return {
+            "binary": True,
+            "size": size,
+            "error": "binary file, it has no lines: read it with offset and length, the content comes in base64",
+        }
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any
+
+import httpx
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class GitHubError(Exception):
+    """A GitHub API request that failed, with its HTTP status and GitHub message"""
+
+    def __init__(self, status: int, message: str, url: str):
+        super().__init__(f"GitHub API {status} on {url}: {message}")
+        self.status = status
+        self.message = message
+        self.url = url
+
+
+class GitHubRateLimited(GitHubError):
+    """The rate limit is exhausted and resets later than the client is willing to wait"""
+
+    def __init__(self, url: str, reset_at: float):
+        super().__init__(403, f"rate limit exceeded, it resets in {reset_at - time.time():.0f}s", url)
+        self.reset_at = reset_at
+
+
+class ETagCache:
+    """
+    Last response of each GET url on a local SQLite file: body, ETag and Last-Modified.
+
+    They are sent back as If-None-Match / If-Modified-Since, and a 304 answer (which does
+    not count against the rate limit) is served from here. Entries are stored per token,
+    so a private repository read with one token is not served to another.
+
+    The file is bounded: on every write the entries not used for ttl seconds, and the
+    least recently used ones beyond max_entries, are deleted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # A lost last write only costs a full GET, no need to fsync each one
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT,
+                stored_at REAL,
+                last_used REAL
+            )
+            """
+        )
+        # Files written before the cache was bounded have no last_used column
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(responses)")]
+        if "last_used" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN last_used REAL")
+            self._conn.execute("UPDATE responses SET last_used = stored_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(url: str, token: str | None) -> str:
+        return hashlib.sha256(f"{token or ''}\n{url}".encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[str | None, str | None, Any] | None:
+        """(etag, last_modified, body) of the cached response"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT etag, last_modified, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return None if row is None else (row[0], row[1], json.loads(row[2]))
+
+    def put(self, key: str, etag: str | None, last_modified: str | None, body: Any):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(body), now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE last_used < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+
+class GitHubClient:
+    """
+    Async GitHub REST client for the MCP tools.
+
+    - One httpx.AsyncClient with keep-alive connections (max_connections), instead of a
+      new TLS connection per urllib call.
+    - GET responses are revalidated with their ETag / Last-Modified (ETagCache), a 304 is
+      a cache hit.
+    - Rate limits: when X-RateLimit-Remaining reaches 0, requests wait for
+      X-RateLimit-Reset; a 403/429 with Retry-After or an exhausted limit is retried after
+      waiting, up to max_wait seconds, GitHubRateLimited is raised if the reset is later.
+      5xx answers and connection errors are retried with exponential backoff.
+
+    base_url (GITHUB_API_URL) can point to a local stub server.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        token: str | None = None,
+        cache_path: str = os.path.join(SCRIPT_DIR, "github_cache.db"),
+        max_connections: int = 10,
+        max_retries: int = 3,
+        max_wait: float = 60.0,
+        timeout: float = 30.0,
+    ):
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL") or "https://api.github.com").rstrip("/")
+        self.token = token if token is not None else os.environ.get("GITHUB_TOKEN")
+        self.cache = ETagCache(cache_path)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        self.requests = 0
+        self.rate_limit_waits = 0
+        self.rate_limit: dict[str, int] = {}
+
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._blocked_until = 0.0
+
+    async def get(self, path: str, params: dict[str, Any] | None = None) -> Any:
+        url = self._url(path, params)
+        key = ETagCache.key(url, self.token)
+        cached = self.cache.get(key)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = await self.request("GET", url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.cache.hits += 1
+            return cached[2]
+
+        self.cache.misses += 1
+        body = response.json()
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            self.cache.put(key, response.headers.get("ETag"), response.headers.get("Last-Modified"), body)
+        return body
+
+    async def post(self, path: str, payload: dict[str, Any]) -> Any:
+        response = await self.request("POST", self._url(path), json=payload)
+        return response.json()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_rate_limit(url)
+            try:
+                self.requests += 1
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise GitHubError(0, f"connection failed: {e!r}", url) from e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            self._track_rate_limit(response)
+            if response.status_code < 400 or response.status_code == 304:
+                return response
+
+            retry_after = self._retry_after(response)
+            if retry_after is not None and attempt < self.max_retries:
+                if retry_after > self.max_wait:
+                    raise GitHubRateLimited(url, time.time() + retry_after)
+                self.rate_limit_waits += 1
+                logging.warning(f"GitHub rate limit on {url}, retrying in {retry_after:.1f}s")
+                await asyncio.sleep(retry_after)
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            raise GitHubError(response.status_code, self._message(response), url)
+        raise AssertionError("unreachable")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # The connections belong to the loop that opened them, e.g. each asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            headers = {"Accept": "application/vnd.github.v3+json", "User-Agent": "GitHub-MCP-Server"}
+            if self.token:
+                headers["Authorization"] = f"token {self.token}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._loop = loop
+        return self._client
+
+    def _url(self, path: str, params: dict[str, Any] | None = None) -> str:
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        return str(httpx.URL(url, params=params)) if params else url
+
+    async def _wait_for_rate_limit(self, url: str):
+        wait = self._blocked_until - time.time()
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            raise GitHubRateLimited(url, self._blocked_until)
+        self.rate_limit_waits += 1
+        logging.warning(f"GitHub rate limit exhausted, waiting {wait:.1f}s for the reset")
+        await asyncio.sleep(wait)
+
+    def _track_rate_limit(self, response: httpx.Response):
+        for header in ("limit", "remaining", "used", "reset"):
+            value = response.headers.get(f"X-RateLimit-{header}")
+            if value is not None and value.isdigit():
+                self.rate_limit[header] = int(value)
+        if self.rate_limit.get("remaining") == 0 and "reset" in self.rate_limit:
+            self._blocked_until = max(self._blocked_until, float(self.rate_limit["reset"]))
+
+    def _retry_after(self, response: httpx.Response) -> float | None:
+        """Seconds to wait before retrying a rate limited response, None if it is another error"""
+        if response.status_code not in (403, 429):
+            return None
+        if retry_after := response.headers.get("Retry-After"):
+            return float(retry_after)
+        if response.headers.get("X-RateLimit-Remaining") == "0" and (reset := response.headers.get("X-RateLimit-Reset")):
+            return max(float(reset) - time.time(), 0.0) + 1.0
+        return None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _message(response: httpx.Response) -> str:
+        try:
+            body = response.json()
+        except ValueError:
+            return response.text
+        return body.get("message", response.text) if isinstance(body, dict) else response.text
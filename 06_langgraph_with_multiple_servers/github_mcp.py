@@ -1,17 +1,44 @@
-import json
-import urllib.request
+import asyncio
 from typing import Dict, Any, Optional
 from mcp.server.fastmcp import FastMCP
 import os
 import subprocess
 import dotenv
+from github_client import GitHubClient
+from file_listing import list_files_page
+from file_reader import FileReader
+from file_patch import FileEdit, apply_changes
 
 dotenv.load_dotenv()
 
-mcp = FastMCP("Github")
+# mcp_launcher.py runs each server on its own port, MCP_PORT
+mcp = FastMCP("Github", port=int(os.environ.get("MCP_PORT", "8000")))
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Keep-alive connections, ETag revalidation and rate limit backoff for every GitHub call
+github = GitHubClient(cache_path=os.path.join(SCRIPT_DIR, "github_cache.db"))
+
+MAX_ISSUES = 100
+
+
+def issue_summary(issue: Dict[str, Any], body_chars: int) -> Dict[str, Any]:
+    """The fields of an issue needed to triage it, with the body cut to body_chars"""
+    body = issue.get("body") or ""
+    summary = {
+        "number": issue["number"],
+        "title": issue["title"],
+        "state": issue["state"],
+        "labels": [label["name"] if isinstance(label, dict) else label for label in issue.get("labels", [])],
+        "comments": issue.get("comments", 0),
+        "body": body[:body_chars] + ("..." if len(body) > body_chars else ""),
+    }
+    if "pull_request" in issue:
+        summary["pull_request"] = True
+    return summary
 
 @mcp.tool()
-def get_github_issue(repo_owner: str, repo_name: str, issue_id: int) -> Dict[str, Any]:
+async def get_github_issue(repo_owner: str, repo_name: str, issue_id: int) -> Dict[str, Any]:
     """
     Get a GitHub issue by ID.
     
@@ -24,23 +51,72 @@ def get_github_issue(repo_owner: str, repo_name: str, issue_id: int) -> Dict[str
         Dictionary containing the issue data
         
     Raises:
-        urllib.error.HTTPError: If the request fails
+        GitHubError: If the request fails
     """
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues/{issue_id}"
-    
-    req = urllib.request.Request(url)
-    req.add_header("Accept", "application/vnd.github.v3+json")
-    req.add_header("User-Agent", "GitHub-Issue-Fetcher")
+    # An issue that did not change is answered with a 304, served from the local cache
+    return await github.get(f"repos/{repo_owner}/{repo_name}/issues/{issue_id}")
 
-    token = os.environ.get("GITHUB_TOKEN")  # Load token from environment variable
-    if token:
-        req.add_header("Authorization", f"token {token}")
-    
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode())
+@mcp.tool()
+async def get_github_issues(
+    repo_owner: str,
+    repo_name: str,
+    issue_ids: Optional[list[int]] = None,
+    labels: Optional[list[str]] = None,
+    state: str = "open",
+    limit: int = 30,
+    body_chars: int = 300,
+    max_concurrency: int = 8,
+) -> Dict[str, Any]:
+    """
+    Get several GitHub issues in one call, as short summaries. Use it instead of calling
+    get_github_issue once per issue.
+
+    Args:
+        repo_owner: The owner of the repository
+        repo_name: The name of the repository
+        issue_ids: The IDs of the issues to get. If not given, the issues matching labels and state are listed
+        labels: Only the issues with all these labels (when issue_ids is not given)
+        state: "open", "closed" or "all" (when issue_ids is not given)
+        limit: The maximum number of issues listed when issue_ids is not given (at most 100)
+        body_chars: The body of each issue is cut to this number of characters
+        max_concurrency: The maximum number of requests to GitHub at the same time
+
+    Returns:
+        Dictionary with the summaries of the issues (number, title, state, labels, comments, body)
+        and the errors of the issues that could not be fetched. Only the first 100 issue_ids are fetched
+
+    Raises:
+        GitHubError: If listing the issues fails
+    """
+    if not issue_ids:
+        limit = max(1, min(limit, MAX_ISSUES))
+        params: Dict[str, Any] = {"state": state, "per_page": limit}
+        if labels:
+            params["labels"] = ",".join(labels)
+        issues = await github.get(f"repos/{repo_owner}/{repo_name}/issues", params)
+        return {"issues": [issue_summary(issue, body_chars) for issue in issues[:limit]], "errors": []}
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch(issue_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await github.get(f"repos/{repo_owner}/{repo_name}/issues/{issue_id}")
+
+    issue_ids = list(dict.fromkeys(issue_ids))
+    skipped = issue_ids[MAX_ISSUES:]
+    issue_ids = issue_ids[:MAX_ISSUES]
+    results = await asyncio.gather(*(fetch(issue_id) for issue_id in issue_ids), return_exceptions=True)
+    summaries = []
+    errors = [{"number": issue_id, "error": f"not fetched, at most {MAX_ISSUES} issues per call"} for issue_id in skipped]
+    for issue_id, result in zip(issue_ids, results):
+        if isinstance(result, Exception):
+            errors.append({"number": issue_id, "error": str(result)})
+        else:
+            summaries.append(issue_summary(result, body_chars))
+    return {"issues": summaries, "errors": errors}
 
 @mcp.tool()
-def create_github_pr(repo_owner: str, repo_name: str, title: str, body: str, head: str, base: str = "main") -> Dict[str, Any]:
+async def create_github_pr(repo_owner: str, repo_name: str, title: str, body: str, head: str, base: str = "main") -> Dict[str, Any]:
     """
     Create a GitHub Pull Request.
     
@@ -57,14 +133,11 @@ def create_github_pr(repo_owner: str, repo_name: str, title: str, body: str, hea
         
     Raises:
         ValueError: If token is not provided
-        urllib.error.HTTPError: If the request fails
+        GitHubError: If the request fails
     """
-    token = os.environ["GITHUB_TOKEN"]
-    if not token:
+    if not github.token:
         raise ValueError("GitHub token is required for creating pull requests")
     
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls"
-    
     pr_data = {
         "title": title,
         "body": body,
@@ -72,20 +145,7 @@ def create_github_pr(repo_owner: str, repo_name: str, title: str, body: str, hea
         "base": base
     }
     
-    req = urllib.request.Request(
-        url, 
-        data=json.dumps(pr_data).encode('utf-8'),
-        method='POST'
-    )
-
-    
-    req.add_header("Accept", "application/vnd.github.v3+json")
-    req.add_header("Content-Type", "application/json")
-    req.add_header("User-Agent", "GitHub-PR-Creator")
-    req.add_header("Authorization", f"token {token}")
-    
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode())
+    return await github.post(f"repos/{repo_owner}/{repo_name}/pulls", pr_data)
 
 @mcp.tool()
 def copy_and_create_branch(
@@ -109,38 +169,93 @@ def copy_and_create_branch(
     return {"branch_path": path}
 
 
+# Files returned per call, the agent asks for the rest with next_cursor
+DEFAULT_MAX_FILES = 500
+MAX_FILES_LIMIT = 5000
+
 @mcp.tool()
-def list_all_files(directory: str) -> list[str]:
+async def list_all_files(
+    directory: str,
+    pattern: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_files: int = DEFAULT_MAX_FILES,
+) -> Dict[str, Any]:
     """
-    List all files in a directory and its subdirectories.
+    List the files in a directory and its subdirectories, skipping .git and what the .gitignore files ignore.
+
+    args:
+        directory: the absolute path of the directory
+        pattern: only the files matching this glob, "*.py" matches the file names, "src/**/*.ts" the relative paths
+        max_depth: how many levels of subdirectories to enter, 0 lists only the files of directory
+        cursor: the next_cursor returned by a previous call with the same arguments, to get the next page
+        max_files: maximum number of files to return (up to 5000)
+
+    Returns:
+        {"root": directory, "columns": ["path", "size", "mtime"], "data": [values of each column],
+        "row_count": n, "next_cursor": str | None}. Paths are relative to root, mtime in unix seconds.
+        If next_cursor is not null there are more files, call again with it.
     """
-    files = []
-    for root, dirs, filenames in os.walk(directory):
-        for filename in filenames:
-            files.append(os.path.join(root, filename))
-    return files
+    if not os.path.isdir(directory):
+        return {"error": f"{directory} is not a directory"}
+    # A big tree takes a while, the other tools keep answering meanwhile
+    return await asyncio.to_thread(
+        list_files_page, directory, pattern, max_depth, cursor, min(max(max_files, 1), MAX_FILES_LIMIT)
+    )
+
+# Line offsets of the files read, so the next ranges of the same file are direct lookups
+file_reader = FileReader()
 
 @mcp.tool()
-def read_file(file_path: str) -> dict[str, str]:
+async def read_file(
+    file_path: str,
+    start_line: int = 1,
+    end_line: Optional[int] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+) -> Dict[str, Any]:
     """
-    Read the contents of a file.
+    Read the contents of a file, by lines or by bytes. At most 256 KB are returned per call.
+
+    args:
+        file_path: the absolute path of the file to read
+        start_line: first line to read, starting at 1
+        end_line: last line to read (included), by default up to the end of the file
+        offset: read bytes instead of lines, starting at this byte. Binary files can only be read this way
+        length: number of bytes to read from offset, by default up to the end of the file
+
+    Returns:
+        By lines: {"content", "start_line", "end_line", "total_lines", "size", "truncated", "next_start_line"}
+        By bytes: {"content", "encoding": "utf-8" | "base64", "offset", "length", "size", "truncated", "next_offset"}
+        If truncated is true the range was bigger than 256 KB, continue from next_start_line or next_offset.
     """
-    with open(file_path, 'r') as file:
-        return {"content": file.read()}
+    if offset is not None or length is not None:
+        return await asyncio.to_thread(file_reader.read_bytes, file_path, offset or 0, length)
+    return await asyncio.to_thread(file_reader.read_lines, file_path, start_line, end_line)
     
 
 @mcp.tool()
-def make_changes(file_path: str, changes: str) -> dict[str, str]:
+async def make_changes(
+    edits: Optional[list[FileEdit]] = None,
+    patch: Optional[str] = None,
+    repo_path: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Make changes to a file.
+    Change one or several files by sending only the changed parts, never the whole file again.
 
     args:
-        file_path: the absolute path of the file to modify
-    """
-    with open(file_path, 'w') as file:
-        file.write(changes)
+        edits: one entry per file, with "file_path" (absolute path) and one of:
+            "search_replace": [{"search": exact text of the file, "replace": new text}, ...], each search must be unique in the file
+            "diff": unified diff of the file (its @@ hunks with a few lines of context)
+            "content": the whole content, only to create a new file
+        patch: a unified diff of several files, as git diff prints it, paths relative to repo_path
+        repo_path: the absolute path of the repository, needed with patch
 
-    return {"status": "success"}
+    Returns:
+        {"status": "success", "files": [{"file_path", "deleted", "hunks", "fuzzy_hunks"}]}, or
+        {"status": "error", "error", "hint"} when a change does not match: then no file was changed.
+    """
+    return await asyncio.to_thread(apply_changes, edits, patch, repo_path)
 
 
 @mcp.tool()
@@ -161,4 +276,5 @@ def commit_and_push_changes(repo_path: str, branch_name: str) -> dict[str, str]:
     return {"status": "success"}
 
 
-mcp.run(transport="streamable-http")
\ No newline at end of file
+# MCP_TRANSPORT=stdio when the agent starts the server itself, see mcp_launcher.py
+mcp.run(transport=os.environ.get("MCP_TRANSPORT", "streamable-http"))
@@ -0,0 +1,150 @@
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+# The summary of the removed turns is always the first message, with this id
+SUMMARY_ID = "history-summary"
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a user and an assistant that uses tools. "
+    "Keep the user goals, the decisions taken, and the facts and numbers found with the tools "
+    "that may be needed later. Answer only with the summary."
+)
+
+Summarizer = Callable[[list[BaseMessage]], Awaitable[str]]
+
+
+def transcript(messages: list[BaseMessage], max_chars: int = 500) -> str:
+    """Plain text of the messages, each one clipped, to be summarized"""
+    lines = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            content += f" (tool calls: {[(call['name'], call['args']) for call in message.tool_calls]})"
+        lines.append(f"{message.type}: {content[:max_chars]}")
+    return "\n".join(lines)
+
+
+def llm_summarizer(model_name: str) -> Summarizer:
+    """Summarizer that asks model_name, its tokens are not streamed to the chat"""
+    model = None
+
+    async def summarize(messages: list[BaseMessage]) -> str:
+        nonlocal model
+        if model is None:
+            from langchain.chat_models import init_chat_model
+            model = init_chat_model(model_name)
+        response = await model.ainvoke(
+            [SystemMessage(SUMMARY_PROMPT), HumanMessage(transcript(messages))],
+            config={"tags": [TAG_NOSTREAM]},
+        )
+        return str(response.content)
+
+    return summarize
+
+
+class HistoryCompactor:
+    """
+    Keeps the prompt of the chatbot under a token budget.
+
+    When the history goes over max_tokens:
+    1. Tool outputs over max_tool_chars are replaced by a short reference (tool name, size
+       and first characters), except the ones the model has not seen yet.
+    2. If it is still over target_tokens, the oldest turns (a user message and everything
+       up to the next one) are removed and replaced by a summary as the first message.
+       Whole turns are removed, so every tool call keeps its tool result. The last turn is
+       always kept.
+
+    Without a summarizer, or if it fails, the summary only lists the removed user requests.
+    Tokens are estimated with count_tokens_approximately (4 characters per token).
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        target_tokens: int | None = None,
+        max_tool_chars: int = 2000,
+        summarize: Summarizer | None = None,
+    ):
+        self.max_tokens = max_tokens
+        # Compacting below the trigger leaves room for a few turns before the next compaction
+        self.target_tokens = target_tokens or max_tokens * 6 // 10
+        self.max_tool_chars = max_tool_chars
+        self.summarize = summarize
+
+    @staticmethod
+    def count(messages: list[BaseMessage]) -> int:
+        return count_tokens_approximately(messages)
+
+    async def node(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Graph node, put it before the chatbot"""
+        compacted = await self.compact(state["messages"])
+        if compacted is None:
+            return {}
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *compacted]}
+
+    async def compact(self, messages: list[BaseMessage]) -> list[BaseMessage] | None:
+        """The compacted history, None if it is under the budget or cannot be reduced"""
+        before = self.count(messages)
+        if before <= self.max_tokens:
+            return None
+        compacted = self.strip_tool_outputs(messages)
+        if self.count(compacted) > self.target_tokens:
+            compacted = await self.drop_old_turns(compacted)
+        # Nothing left to strip or drop (a single long turn): keep the history as it is
+        # instead of replacing it with itself on every step
+        if len(compacted) == len(messages) and all(
+            new.id == old.id and new.content == old.content for new, old in zip(compacted, messages)
+        ):
+            return None
+        logging.info(f"History compacted from {before} to {self.count(compacted)} tokens ({len(messages)} -> {len(compacted)} messages)")
+        return compacted
+
+    def strip_tool_outputs(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        last_tool_call = max((i for i, message in enumerate(messages) if isinstance(message, AIMessage) and message.tool_calls), default=len(messages))
+        stripped = []
+        for i, message in enumerate(messages):
+            content = message.content if isinstance(message.content, str) else str(message.content)
+            if isinstance(message, ToolMessage) and i < last_tool_call and len(content) > self.max_tool_chars:
+                reference = (
+                    f"[Output of {message.name} removed from the history to save context: "
+                    f"{len(content)} characters, it started with: {content[:200]}...]"
+                )
+                # Same id and tool_call_id, so the pair with its tool call is kept
+                message = message.model_copy(update={"content": reference})
+            stripped.append(message)
+        return stripped
+
+    async def drop_old_turns(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        summary = messages[0] if messages and messages[0].id == SUMMARY_ID else None
+        body = messages[1:] if summary else messages
+        turn_starts = [i for i, message in enumerate(body) if isinstance(message, HumanMessage)]
+        if len(turn_starts) < 2:
+            return messages
+
+        # Keep the most recent turns that fit, the summary takes the rest of the budget
+        cut = turn_starts[-1]
+        for start in turn_starts[1:]:
+            if self.count(body[start:]) <= self.target_tokens * 8 // 10:
+                cut = start
+                break
+        removed = ([summary] if summary else []) + body[:cut]
+        return [SystemMessage(await self._summary(removed), id=SUMMARY_ID), *body[cut:]]
+
+    async def _summary(self, removed: list[BaseMessage]) -> str:
+        if self.summarize is not None:
+            try:
+                return f"Summary of the earlier conversation:\n{await self.summarize(removed)}"
+            except Exception as e:
+                logging.warning(f"History summary failed, the old turns are truncated instead: {e}")
+        requests = []
+        for message in removed:
+            if message.id == SUMMARY_ID:
+                requests += [line for line in str(message.content).splitlines() if line.startswith("- ")]
+            elif isinstance(message, HumanMessage):
+                requests.append(f"- {str(message.content)[:200]}")
+        return "Earlier messages were removed from the history. Last requests of the user:\n" + "\n".join(requests[-20:])
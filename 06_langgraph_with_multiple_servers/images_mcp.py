@@ -1,8 +1,11 @@
 import base64 
+import os
 from openai import OpenAI 
 from mcp.server.fastmcp import FastMCP
+from loop_lag_monitor import lag_monitor
 
-mcp = FastMCP("images")
+# LOOP_LAG_MONITOR=1 reports the tools that block the server event loop
+mcp = FastMCP("images", port=int(os.environ.get("MCP_PORT", "8000")), lifespan=lag_monitor.lifespan)
 
 client = OpenAI() 
 
@@ -46,4 +49,5 @@ def extract_data_from_image(image_path: str) -> str:
     return response.output_text
 
 
-mcp.run(transport="streamable-http")
\ No newline at end of file
+# MCP_TRANSPORT=stdio when the agent starts the server itself, see mcp_launcher.py
+mcp.run(transport=os.environ.get("MCP_TRANSPORT", "streamable-http"))
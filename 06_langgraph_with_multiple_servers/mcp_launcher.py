@@ -0,0 +1,188 @@
+"""
+Starts every MCP server of this example at the same time, each one on its own port.
+
+"uv run mcp_launcher.py" starts them, reports how long each one took to accept
+connections and loads their tools once, then keeps them running until Ctrl+C. The agent
+connects to all of them (server_connections()) and sees their tools in one list, named
+<server>__<tool> (ToolRegistry).
+
+With MCP_TRANSPORT=stdio nothing has to be launched: the agent starts each server as a
+subprocess and talks to it over stdin/stdout.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from mcp_session_pool import McpSessionPool
+from tool_memo import memoize_tools
+
+HOST = "127.0.0.1"
+# Server name -> (script, port). The name is also the prefix of its tools
+SERVERS = {
+    "database": ("database_mcp.py", 8001),
+    "github": ("github_mcp.py", 8002),
+    "images": ("images_mcp.py", 8003),
+}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def server_connections(transport: str | None = None) -> dict[str, dict]:
+    """MultiServerMCPClient connections of every server, over HTTP (default) or stdio"""
+    transport = transport or os.environ.get("MCP_TRANSPORT", "streamable_http")
+    if transport == "stdio":
+        return {
+            name: {
+                "command": sys.executable,
+                "args": [os.path.join(HERE, script)],
+                "cwd": HERE,
+                "env": {**os.environ, "MCP_TRANSPORT": "stdio"},
+                "transport": "stdio",
+            }
+            for name, (script, _) in SERVERS.items()
+        }
+    return {
+        name: {"url": f"http://{HOST}:{port}/mcp", "transport": "streamable_http"}
+        for name, (_, port) in SERVERS.items()
+    }
+
+
+class ToolRegistry:
+    """
+    The tools of every server in one list, each one renamed <server>__<tool> so two
+    servers can have tools with the same name.
+
+    The tools of all servers are loaded concurrently through the session pool, which
+    caches them. A server that is down is left out (and logged) instead of failing the
+    whole list, it is tried again on the next call.
+    """
+
+    SEPARATOR = "__"
+
+    def __init__(self, session_pool: McpSessionPool, servers: list[str]):
+        self.session_pool = session_pool
+        self.servers = servers
+        self.load_times: dict[str, float] = {}
+        # server -> (tools of the pool, renamed copies), copied again only when the pool reloads them
+        self._namespaced: dict[str, tuple[list[BaseTool], list[BaseTool]]] = {}
+
+    async def get_tools(self) -> list[BaseTool]:
+        results = await asyncio.gather(*(self._server_tools(server) for server in self.servers), return_exceptions=True)
+        tools: list[BaseTool] = []
+        for server, result in zip(self.servers, results):
+            if isinstance(result, BaseException):
+                logging.warning(f"MCP server {server} is not available, its tools are left out: {result!r}")
+                continue
+            tools += result
+        return tools
+
+    def split_name(self, tool_name: str) -> tuple[str, str]:
+        """(server, original tool name) of a namespaced tool name"""
+        server, _, name = tool_name.partition(self.SEPARATOR)
+        return server, name
+
+    async def _server_tools(self, server: str) -> list[BaseTool]:
+        start = time.perf_counter()
+        tools = await self.session_pool.get_tools(server)
+        cached = self._namespaced.get(server)
+        if cached is None or cached[0] is not tools:
+            self.load_times[server] = time.perf_counter() - start
+            # The MCP call inside each tool keeps using the original name, the ones the
+            # server marks as cacheable answer repeated calls from a cache (tool_memo.py)
+            renamed = memoize_tools([tool.model_copy(update={"name": f"{server}{self.SEPARATOR}{tool.name}"}) for tool in tools])
+            self._namespaced[server] = cached = (tools, renamed)
+        return cached[1]
+
+
+@dataclass
+class LaunchedServer:
+    name: str
+    port: int
+    process: asyncio.subprocess.Process
+    startup_seconds: float | None = None
+
+
+class McpLauncher:
+    """Starts the servers in parallel as subprocesses and waits until each one accepts connections"""
+
+    def __init__(self, servers: dict[str, tuple[str, int]] = SERVERS, startup_timeout: float = 60.0):
+        self.servers = servers
+        self.startup_timeout = startup_timeout
+        self.launched: dict[str, LaunchedServer] = {}
+
+    async def start(self) -> dict[str, float]:
+        """Startup seconds of each server, it raises if one of them does not start"""
+        await asyncio.gather(*(self._start(name, script, port) for name, (script, port) in self.servers.items()))
+        return {name: server.startup_seconds for name, server in self.launched.items()}  # type: ignore[misc]
+
+    async def stop(self):
+        for server in self.launched.values():
+            if server.process.returncode is None:
+                server.process.terminate()
+        await asyncio.gather(*(server.process.wait() for server in self.launched.values()))
+        self.launched.clear()
+
+    async def __aenter__(self) -> "McpLauncher":
+        try:
+            await self.start()
+        except BaseException:
+            await self.stop()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _start(self, name: str, script: str, port: int):
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(HERE, script),
+            cwd=HERE,
+            env={**os.environ, "MCP_PORT": str(port), "MCP_TRANSPORT": "streamable-http"},
+        )
+        server = self.launched[name] = LaunchedServer(name, port, process)
+        while True:
+            if process.returncode is not None:
+                raise RuntimeError(f"MCP server {name} ({script}) exited with code {process.returncode}")
+            if time.perf_counter() - start > self.startup_timeout:
+                raise TimeoutError(f"MCP server {name} ({script}) did not listen on port {port} in {self.startup_timeout}s")
+            try:
+                _, writer = await asyncio.open_connection(HOST, port)
+            except OSError:
+                await asyncio.sleep(0.05)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            break
+        server.startup_seconds = time.perf_counter() - start
+        logging.info(f"MCP server {name} listening on {HOST}:{port} after {server.startup_seconds:.2f}s")
+
+
+async def main():
+    async with McpLauncher() as launcher:
+        for name, server in launcher.launched.items():
+            print(f"{name:<10} http://{HOST}:{server.port}/mcp  started in {server.startup_seconds:.2f}s")
+
+        session_pool = McpSessionPool(MultiServerMCPClient(server_connections("streamable_http")))  # type: ignore
+        registry = ToolRegistry(session_pool, list(SERVERS))
+        start = time.perf_counter()
+        tools = await registry.get_tools()
+        print(f"{len(tools)} tools loaded from {len(registry.load_times)} servers in {time.perf_counter() - start:.2f}s: "
+              + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in registry.load_times.items()))
+        await session_pool.aclose()
+
+        print("Press Ctrl+C to stop the servers")
+        await asyncio.gather(*(server.process.wait() for server in launcher.launched.values()))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,145 @@
+import base64
+import itertools
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from query_guard import query_guard
+from result_cache import get_result_cache
+from sqlite_pool import get_pool
+
+
+def to_json_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    return value
+
+
+def columnar_page(columns: list[str], rows: list[tuple], next_cursor: str | None) -> dict[str, Any]:
+    """Compact JSON-serializable page: one list of values per column instead of one dict per row"""
+    return {
+        "columns": columns,
+        "data": [[to_json_value(value) for value in column] for column in zip(*rows)] if rows else [[] for _ in columns],
+        "row_count": len(rows),
+        "next_cursor": next_cursor,
+    }
+
+
+@dataclass
+class OpenCursor:
+    db_path: str
+    columns: list[str]
+    rows: Iterator[tuple]
+    # Rows already read from the iterator but not returned yet
+    pending: list[tuple] = field(default_factory=list)
+    # Pooled connection and cursor backing the rows, None when they come from the result cache
+    conn: sqlite3.Connection | None = None
+    sqlite_cursor: sqlite3.Cursor | None = None
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class QueryCursorStore:
+    """
+    Runs queries page by page, so only max_rows rows are ever held in memory.
+
+    When a query has more rows than fit in a page its cursor is kept open under a
+    random token that fetch_more() continues from. Only a few cursors stay open at the
+    same time and idle ones are closed, since the agent often never asks for more.
+    Results that fit in a single page go through the query result cache.
+    """
+
+    def __init__(self, max_open_cursors: int = 4, idle_timeout: float = 300.0):
+        self.max_open_cursors = max_open_cursors
+        self.idle_timeout = idle_timeout
+        self._cursors: dict[str, OpenCursor] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, sql_query: str, db_path: str, max_rows: int) -> dict[str, Any]:
+        self._close_idle()
+        result_cache = get_result_cache(db_path)
+        cached, version = result_cache.lookup(sql_query)
+        if cached is not None:
+            columns, rows = cached
+            cursor = OpenCursor(db_path, list(columns), iter(rows))
+            return self._page(cursor, max_rows)
+
+        pool = get_pool(db_path)
+        conn = pool.acquire()
+        sqlite_cursor = None
+        try:
+            # Rejects cross joins before running, then limits the time and steps of every page
+            query_guard.check_plan(conn, sql_query, db_path)
+            with query_guard.budget(conn):
+                sqlite_cursor = conn.execute(sql_query)
+                columns = [description[0] for description in sqlite_cursor.description or []]
+                rows = sqlite_cursor.fetchmany(max_rows + 1)
+        except Exception:
+            # An interrupted statement must not stay open on the pooled connection
+            if sqlite_cursor is not None:
+                sqlite_cursor.close()
+            pool.release(conn)
+            raise
+
+        if len(rows) <= max_rows:
+            pool.release(conn)
+            result_cache.store(sql_query, (columns, rows), version)
+            return columnar_page(columns, rows, None)
+
+        cursor = OpenCursor(db_path, columns, iter(sqlite_cursor), rows, conn, sqlite_cursor)
+        return self._page(cursor, max_rows)
+
+    def fetch_more(self, cursor_id: str, max_rows: int) -> dict[str, Any]:
+        self._close_idle()
+        with self._lock:
+            cursor = self._cursors.pop(cursor_id, None)
+        if cursor is None:
+            raise KeyError(f"Unknown or expired cursor '{cursor_id}', execute the query again")
+        return self._page(cursor, max_rows)
+
+    def _page(self, cursor: OpenCursor, max_rows: int) -> dict[str, Any]:
+        try:
+            with query_guard.budget(cursor.conn) if cursor.conn is not None else nullcontext():
+                rows = cursor.pending[:max_rows]
+                rows.extend(itertools.islice(cursor.rows, max_rows - len(rows)))
+                # Read one row ahead to know whether there is a next page
+                cursor.pending = cursor.pending[max_rows:] or list(itertools.islice(cursor.rows, 1))
+        except Exception:
+            self._close(cursor)
+            raise
+        if not cursor.pending:
+            self._close(cursor)
+            return columnar_page(cursor.columns, rows, None)
+
+        cursor.last_used = time.monotonic()
+        cursor_id = secrets.token_urlsafe(8)
+        with self._lock:
+            self._cursors[cursor_id] = cursor
+            evicted = []
+            while len(self._cursors) > self.max_open_cursors:
+                oldest = min(self._cursors, key=lambda key: self._cursors[key].last_used)
+                evicted.append(self._cursors.pop(oldest))
+        for old_cursor in evicted:
+            self._close(old_cursor)
+
+        return columnar_page(cursor.columns, rows, cursor_id)
+
+    def _close_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, cursor in self._cursors.items() if now - cursor.last_used > self.idle_timeout]
+            expired = [self._cursors.pop(key) for key in idle]
+        for cursor in expired:
+            self._close(cursor)
+
+    def _close(self, cursor: OpenCursor):
+        if cursor.sqlite_cursor is not None:
+            # Finalizes the statement so it stops holding a read snapshot
+            cursor.sqlite_cursor.close()
+            cursor.sqlite_cursor = None
+        if cursor.conn is not None:
+            get_pool(cursor.db_path).release(cursor.conn)
+            cursor.conn = None
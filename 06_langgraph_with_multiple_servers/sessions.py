@@ -0,0 +1,54 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langchain_core.runnables import RunnableConfig
+
+# Fixed namespace, so a Gradio session always maps to the same checkpointer thread
+SESSION_NAMESPACE = uuid.UUID("6f1d2a52-3c39-4b8e-9a57-2f0a4f8f1c11")
+
+
+def thread_id_for_session(session_hash: str | None) -> str:
+    """Checkpointer thread of a Gradio session (request.session_hash), a new one if there is no session"""
+    if not session_hash:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(SESSION_NAMESPACE, session_hash))
+
+
+def thread_config(thread_id: str) -> RunnableConfig:
+    return RunnableConfig({"configurable": {"thread_id": thread_id}})
+
+
+class ThreadLocks:
+    """
+    One asyncio.Lock per conversation thread.
+
+    Runs of different threads go on concurrently, two runs of the same thread (a double
+    submit, or two resumes of the same interrupt) wait for each other, so the second one
+    sees the state the first one left. A lock is dropped when nobody holds or waits for it.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str) -> AsyncIterator[None]:
+        lock, users = self._locks.get(thread_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[thread_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[thread_id]
+            if users == 1:
+                del self._locks[thread_id]
+            else:
+                self._locks[thread_id] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+thread_locks = ThreadLocks()
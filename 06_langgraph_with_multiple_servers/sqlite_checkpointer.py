@@ -0,0 +1,394 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_last_used ON threads (last_used);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Checkpointer on a local SQLite file, bounded in size, with the same storage layout
+    as InMemorySaver: checkpoints, one blob per channel version, and pending writes.
+
+    - keep_last: only the last N checkpoints of each thread are kept (enough to resume an
+      interrupt; older ones only serve the state history). They are pruned in batches,
+      when a thread reaches twice that number, with the blobs no checkpoint uses anymore.
+    - ttl / max_threads: threads idle for ttl seconds, and the least recently used ones
+      beyond max_threads, are deleted.
+    - compact_interval: every that many seconds a put() runs compact(): evicts idle
+      threads, gives the free pages back to the file system and truncates the WAL.
+
+    Writes are small transactions on a WAL database with synchronous=NORMAL, run inline
+    like InMemorySaver does, behind a lock so any thread can use it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        keep_last: int = 10,
+        ttl: float = 7 * 24 * 3600,
+        max_threads: int = 10_000,
+        compact_interval: float = 300.0,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = keep_last
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.compact_interval = compact_interval
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # Only takes effect on a new file, before the tables exist
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        self._lock = threading.RLock()
+        self._counts: dict[tuple[str, str], int] = {}
+        self._last_compact = time.monotonic()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(f"{query} AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self.conn.execute(f"{query} ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+            return self._to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, row)
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint_copy = checkpoint.copy()
+        values: dict[str, Any] = checkpoint_copy.pop("channel_values")  # type: ignore[misc]
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version), *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint_copy)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     checkpoint_type, checkpoint_data, metadata_type, metadata_data),
+                )
+                self._touch(thread_id)
+                if self._count(thread_id, checkpoint_ns) >= 2 * self.keep_last:
+                    self._prune(thread_id, checkpoint_ns)
+            if time.monotonic() - self._last_compact >= self.compact_interval:
+                self.compact()
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        regular, special = [], []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, *self.serde.dumps_typed(value), task_path)
+            # Regular writes are never overwritten, special ones (errors, interrupts...) are
+            (regular if write_idx >= 0 else special).append(row)
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", regular)
+            self.conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", special)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self.conn:
+            self._delete_threads([thread_id])
+
+    # The async methods run the sqlite3 calls in a worker thread, they would block the event loop
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same versions as InMemorySaver: zero-padded counter, so they sort as text
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def evict(self) -> int:
+        """Delete the threads idle for more than ttl and the least recently used beyond max_threads"""
+        with self._lock, self.conn:
+            idle = [row[0] for row in self.conn.execute("SELECT thread_id FROM threads WHERE last_used < ?", (time.time() - self.ttl,))]
+            excess = self.conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0] - len(idle) - self.max_threads
+            if excess > 0:
+                idle += [row[0] for row in self.conn.execute(
+                    "SELECT thread_id FROM threads WHERE last_used >= ? ORDER BY last_used LIMIT ?",
+                    (time.time() - self.ttl, excess),
+                )]
+            self._delete_threads(idle)
+        return len(idle)
+
+    def compact(self) -> dict[str, int]:
+        with self._lock:
+            evicted = self.evict()
+            freed = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self.conn.execute("PRAGMA incremental_vacuum")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._last_compact = time.monotonic()
+        if evicted or freed:
+            logging.info(f"Checkpointer compaction: {evicted} idle threads evicted, {freed} pages freed")
+        return {"evicted_threads": evicted, "freed_pages": freed}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = {
+                table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("threads", "checkpoints", "blobs", "writes")
+            }
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            counts["file_bytes"] = page_size * self.conn.execute("PRAGMA page_count").fetchone()[0]
+        return counts
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_data, metadata_type, metadata_data = row
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"])},
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in self.conn.execute(
+                    "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                )
+            ],
+        )
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        if not versions:
+            return {}
+        pairs = [(channel, str(version)) for channel, version in versions.items()]
+        rows = self.conn.execute(
+            f"SELECT channel, type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND (channel, version) IN (VALUES {', '.join(['(?, ?)'] * len(pairs))})",
+            (thread_id, checkpoint_ns, *[value for pair in pairs for value in pair]),
+        )
+        return {channel: self.serde.loads_typed((value_type, value)) for channel, value_type, value in rows if value_type != "empty"}
+
+    def _touch(self, thread_id: str):
+        self.conn.execute(
+            "INSERT INTO threads VALUES (?, ?) ON CONFLICT (thread_id) DO UPDATE SET last_used = excluded.last_used",
+            (thread_id, time.time()),
+        )
+
+    def _count(self, thread_id: str, checkpoint_ns: str) -> int:
+        key = (thread_id, checkpoint_ns)
+        if key in self._counts:
+            self._counts[key] += 1
+        else:
+            self._counts[key] = self.conn.execute(
+                "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", key
+            ).fetchone()[0]
+        return self._counts[key]
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Keep the last keep_last checkpoints of the thread and the blobs they use"""
+        key = (thread_id, checkpoint_ns)
+        oldest_kept = self.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (*key, self.keep_last - 1),
+        ).fetchone()
+        if oldest_kept is None:
+            return
+        self.conn.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", (*key, oldest_kept[0]))
+        self.conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", (*key, oldest_kept[0]))
+
+        used = set()
+        for checkpoint_type, checkpoint_data in self.conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", key
+        ):
+            checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+            used.update((channel, str(version)) for channel, version in checkpoint["channel_versions"].items())
+        unused = [
+            (*key, channel, version)
+            for channel, version in self.conn.execute("SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?", key)
+            if (channel, version) not in used
+        ]
+        self.conn.executemany("DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", unused)
+        self._counts[key] = self.keep_last
+
+    def _delete_threads(self, thread_ids: Sequence[str]):
+        rows = [(thread_id,) for thread_id in thread_ids]
+        for table in ("checkpoints", "blobs", "writes", "threads"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", rows)
+        deleted = set(thread_ids)
+        self._counts = {key: count for key, count in self._counts.items() if key[0] not in deleted}
+
+
+def checkpointer_from_env() -> BaseCheckpointSaver:
+    """SQLiteCheckpointer on the CHECKPOINT_DB file if it is set, InMemorySaver otherwise"""
+    path = os.environ.get("CHECKPOINT_DB")
+    if not path:
+        return InMemorySaver()
+    logging.info(f"Checkpoints are stored in {path}")
+    return SQLiteCheckpointer(path)
@@ -0,0 +1,121 @@
+import logging
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SQLiteReadPool:
+    """
+    Thread-safe pool of read-only SQLite connections to a single database file.
+
+    Connections are opened once in read-only URI mode and tuned for analytics reads,
+    so every query reuses an open file, a warm page cache and the connection's
+    prepared statement cache instead of paying connect/close each time.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_connections: int = 8,
+        wal: bool = True,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kib: int = 64 * 1024,
+        cached_statements: int = 256,
+        timeout: float = 30.0,
+    ):
+        self.db_path = os.path.abspath(db_path)
+        self.max_connections = max_connections
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._uri = pathlib.Path(self.db_path).as_uri() + "?mode=ro"
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        if wal:
+            self._enable_wal()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection out of the pool, it must be given back with release()"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_connections:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        # Every connection is busy, wait for one to come back
+        return self._idle.get(timeout=self.timeout)
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
+                self._created -= 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        # Negative values are KiB instead of pages
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kib)}")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _enable_wal(self):
+        # journal_mode is persisted in the file but can only be changed by a writer,
+        # with WAL readers are never blocked by someone loading data.
+        try:
+            conn = sqlite3.connect(self._uri.replace("?mode=ro", "?mode=rw"), uri=True)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Could not enable WAL on {self.db_path}: {e}")
+
+
+_pools: dict[str, SQLiteReadPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> SQLiteReadPool:
+    """Return the process-wide pool of the database, creating it on first use"""
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = SQLiteReadPool(db_path)
+            _pools[db_path] = pool
+        return pool
@@ -0,0 +1,37 @@
+import sqlite3
+import time
+
+import pytest
+
+from query_guard import QueryBudgetExceeded, QueryGuard
+
+
+def test_late_interrupt_never_reaches_the_next_query():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+    guard = QueryGuard(max_seconds=0.05)
+
+    # The statement returns in time, the timer fires while its cursor is still open
+    with pytest.raises(QueryBudgetExceeded):
+        with guard.budget(conn):
+            cursor = conn.execute("SELECT x FROM t")
+            cursor.fetchmany(10)
+            time.sleep(0.2)
+    cursor.close()
+
+    with guard.budget(conn):
+        assert conn.execute("SELECT count(*) FROM t").fetchone() == (100,)
+    time.sleep(0.1)
+    assert conn.execute("SELECT count(*) FROM t").fetchone() == (100,)
+
+
+def test_stops_a_slow_query():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    guard = QueryGuard(max_seconds=0.1)
+    slow = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n"
+    with pytest.raises(QueryBudgetExceeded) as error:
+        with guard.budget(conn):
+            conn.execute(slow).fetchall()
+    assert error.value.details["reason"] == "time"
+    assert conn.execute("SELECT 1").fetchone() == (1,)
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import tempfile
+
+from query_stream import QueryCursorStore
+from result_cache import get_result_cache
+
+
+def test_cached_result_keeps_null_integers():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        conn = sqlite3.connect(db_path)
+        # Already in WAL mode, so the pool does not change the database on its first connection
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE orders (id INTEGER, quantity INTEGER)")
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [(1, 3), (2, None), (3, 7)])
+        conn.commit()
+        conn.close()
+
+        store = QueryCursorStore()
+        sql_query = "SELECT id, quantity FROM orders ORDER BY id"
+        first = store.execute(sql_query, db_path, max_rows=10)
+        second = store.execute(sql_query, db_path, max_rows=10)
+
+        assert get_result_cache(db_path).stats()["hits"] == 1
+        assert first == second
+        assert first["data"] == [[1, 2, 3], [3, None, 7]]
+        assert all(type(value) is int for value in second["data"][1] if value is not None)
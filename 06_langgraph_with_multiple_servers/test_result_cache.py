@@ -0,0 +1,16 @@
+from result_cache import canonicalize_sql
+
+
+def test_whitespace_and_trailing_semicolon_are_ignored():
+    assert canonicalize_sql("SELECT  a,\n  b\tFROM t ;") == canonicalize_sql("SELECT a, b FROM t")
+
+
+def test_literals_identifiers_and_comments_are_kept():
+    for first, second in [
+        ("SELECT 'a  b'", "SELECT 'a b'"),
+        ('SELECT "x  y" FROM t', 'SELECT "x y" FROM t'),
+        ("SELECT 1 FROM [my  table]", "SELECT 1 FROM [my table]"),
+        ("SELECT 1 -- note\n, 2", "SELECT 1 -- note , 2"),
+        ("SELECT /* a   b */ 1", "SELECT /* a b */ 1"),
+    ]:
+        assert canonicalize_sql(first) != canonicalize_sql(second)
@@ -6,7 +6,7 @@ from langgraph.graph.message import add_messages
 import asyncio
 from langgraph.types import interrupt, Command
 from typing import Literal
-from langgraph.checkpoint.memory import InMemorySaver
+from sqlite_checkpointer import checkpointer_from_env
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
@@ -96,6 +96,7 @@ graph_builder.add_edge("Tarta", END)
 graph_builder.add_edge("Pasta_Alone", END)
 graph_builder.add_edge("Pasta_Youtube", END)
 
+# CHECKPOINT_DB=checkpoints.db keeps the conversations in SQLite, see sqlite_checkpointer.py
 graph = graph_builder.compile(
-    checkpointer=InMemorySaver()
+    checkpointer=checkpointer_from_env()
 )
\ No newline at end of file
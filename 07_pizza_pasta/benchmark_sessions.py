@@ -0,0 +1,85 @@
+"""
+Load test of many concurrent Gradio sessions on the pizza/pasta graph.
+
+Every session has its own thread and walks one of the paths of the graph, all at the same
+time. Each one must get exactly its own answers. Then every session sends two resumes of
+the same interrupt at once (a double submit): with the per-thread locks one of them resumes
+the interrupt and the other starts a new conversation after it, without them both see the
+interrupt and resume it.
+"uv run benchmark_sessions.py"
+"uv run benchmark_sessions.py --sessions 200 --no-locks"
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+import utils
+from sessions import thread_id_for_session
+
+PATHS = [
+    (["hi", "y", "Pizza"], "Go to supermarket and buy an already made pizza!"),
+    (["hi", "y", "Tarta"], "you need eggs, flour, sugar and butter. Go to supermarket and buy them!"),
+    (["hi", "y", "Pasta", "y"], "Ask your Italian Grandma for the recipe!"),
+    (["hi", "y", "Pasta", "n"], "Sorry to hear that, I cannot help you, search in Youtube for that recipe!"),
+]
+
+
+async def send(message: str, thread_id: str, latencies: list[float]) -> str:
+    start = time.perf_counter()
+    response = ""
+    async for response in utils.run_agent_with_stop(message, [], thread_id):
+        pass
+    latencies.append(time.perf_counter() - start)
+    return response
+
+
+async def conversation(session: int, latencies: list[float]) -> bool:
+    messages, answer = PATHS[session % len(PATHS)]
+    thread_id = thread_id_for_session(f"session-{session}")
+    for message in messages:
+        response = await send(message, thread_id, latencies)
+    return answer in response
+
+
+async def double_resume(session: int, latencies: list[float]) -> bool:
+    """Two answers to the same "Choose an option" interrupt at once"""
+    thread_id = thread_id_for_session(f"double-{session}")
+    await send("hi", thread_id, latencies)
+    await send("y", thread_id, latencies)
+    responses = await asyncio.gather(send("Pizza", thread_id, latencies), send("Tarta", thread_id, latencies))
+    finished = sum("Go to supermarket" in response for response in responses)
+    restarted = sum("Do you want to eat something" in response for response in responses)
+    return finished == 1 and restarted == 1
+
+
+async def run(sessions: int) -> None:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    ok = await asyncio.gather(*(conversation(session, latencies) for session in range(sessions)))
+    elapsed = time.perf_counter() - start
+    print(f"{sessions} concurrent sessions, {len(latencies)} turns in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} turns/s)")
+    print(f"  turn latency p50 {1000 * statistics.median(latencies):.1f} ms, "
+          f"p95 {1000 * statistics.quantiles(latencies, n=20)[-1]:.1f} ms")
+    print(f"  sessions with the right answer: {sum(ok)}/{sessions}")
+
+    latencies.clear()
+    ok = await asyncio.gather(*(double_resume(session, latencies) for session in range(sessions)))
+    print(f"  double resumes resolved one after the other: {sum(ok)}/{sessions}")
+
+
+@asynccontextmanager
+async def no_lock(_thread_id: str):
+    yield
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--no-locks", action="store_true", help="disable the per-thread locks to see the races")
+    args = parser.parse_args()
+
+    if args.no_locks:
+        utils.thread_locks.hold = no_lock
+    asyncio.run(run(args.sessions))
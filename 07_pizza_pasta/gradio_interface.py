@@ -1,5 +1,11 @@
 import gradio as gr
 from utils import run_agent_with_stop
+from sessions import thread_id_for_session
 
-demo = gr.ChatInterface(fn=run_agent_with_stop)
-demo.launch()
\ No newline at end of file
+async def chat(message: str, history: list, request: gr.Request):
+    # Every browser session gets its own conversation thread and interrupt state
+    async for response in run_agent_with_stop(message, history, thread_id_for_session(request.session_hash)):
+        yield response
+
+demo = gr.ChatInterface(fn=chat)
+demo.launch()
@@ -1,51 +1,49 @@
-from langchain_core.runnables import RunnableConfig
-import uuid
 from langgraph.types import interrupt, Command
 from agent import State, graph
 import asyncio
-import langgraph.types
+from agent_events import AgentEventParser, Transcript
+from sessions import thread_config, thread_id_for_session, thread_locks
 
-config = RunnableConfig({"configurable": {"thread_id": uuid.uuid4()}})
+# Thread of the scripts, the Gradio interface passes one thread per browser session
+default_thread_id = thread_id_for_session(None)
 
-async def run_agent(message: str, comand: Command | None = None):
-    yielded_response = ""
+async def run_agent(message: str, comand: Command | None = None, thread_id: str = default_thread_id):
     stream_message = State({
         "messages": [message], 
         "user_response": "", 
         "chatbot_response": ""
     }) if comand is None else comand
     
-    async for async_stream_response in graph.astream(stream_message, config):
-        interrupt_condition = ("__interrupt__" in async_stream_response) and (type(async_stream_response["__interrupt__"]) == tuple) and (len(async_stream_response["__interrupt__"]) == 1) and (type(async_stream_response["__interrupt__"][0]) == langgraph.types.Interrupt)
-        if interrupt_condition:
-            yielded_response += async_stream_response["__interrupt__"][0].value
-            yielded_response += "\n \n"
-
-        for node_name, node_data in async_stream_response.items():
-            if isinstance(node_data, dict) and "chatbot_response" in node_data:
-                messages = node_data["chatbot_response"]
-                yielded_response += str(messages) + "\n \n"
-
-        yield yielded_response
+    # Interrupt questions and chatbot_response of the nodes, as typed events, see agent_events.py
+    parser = AgentEventParser()
+    transcript = Transcript()
+    async for async_stream_response in graph.astream(stream_message, thread_config(thread_id)):
+        if transcript.add(parser.parse(async_stream_response)):
+            yield transcript.text
+
+    if transcript.pending:
+        yield transcript.text
         
 
-async def run_agent_with_stop(message:str, history: list):
+async def run_agent_with_stop(message:str, history: list, thread_id: str = default_thread_id):
     """Example of how to consume yielded responses from outside"""
 
-    state = await graph.aget_state(config)
-    next_node = state.next
+    # Checking the state and resuming must not interleave with another run of the same thread
+    async with thread_locks.hold(thread_id):
+        state = await graph.aget_state(thread_config(thread_id))
+        next_node = state.next
 
-    # Check if graph is in a stopped state (no next nodes to execute)
-    is_not_stopped = not next_node or len(next_node) == 0
+        # Check if graph is in a stopped state (no next nodes to execute)
+        is_not_stopped = not next_node or len(next_node) == 0
 
-    if is_not_stopped:
-        async for yielded_data in run_agent(message):
-            yield yielded_data
+        if is_not_stopped:
+            async for yielded_data in run_agent(message, thread_id=thread_id):
+                yield yielded_data
 
-    else:
-        command = Command(resume=message)
-        async for yielded_data in run_agent("", command):
-            yield yielded_data
+        else:
+            command = Command(resume=message)
+            async for yielded_data in run_agent("", command, thread_id):
+                yield yielded_data
 
 async def main():
     async for response in run_agent_with_stop("Hello", []):